@@ -3,7 +3,7 @@ from app.config import MONGO_URI, MONGO_URI_PRD
 from app.services.ipca_correcao_orquestrador import IPCACorrectionOrchestrator
 from app.services.ipca_correcao_engine import IPCACorrectionEngine
 from app.services.ipca_gap_analyzer import IPCAGapAnalyzer
-from pymongo import MongoClient
+from app.utils.mongo_utils import obter_cliente_mongo
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,10 +15,9 @@ ipca_correcao_bp = Blueprint('ipca_correcao', __name__, url_prefix='/ipca-correc
 def get_services():
     # Substitua pela sua configuração de DB
     # TODO verificar
-    client = MongoClient(MONGO_URI)
-    db = client.sgppServices
-    client_prd = MongoClient(MONGO_URI_PRD)
-    db_prd = client_prd.sgppServices
+    # Clientes compartilhados pelo processo (pool de conexões reaproveitado entre requisições)
+    db = obter_cliente_mongo(MONGO_URI).sgppServices
+    db_prd = obter_cliente_mongo(MONGO_URI_PRD).sgppServices
     
     gap_analyzer = IPCAGapAnalyzer(db, db_prd)
     correction_engine = IPCACorrectionEngine(db, db_prd, gap_analyzer)
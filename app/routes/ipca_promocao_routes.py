@@ -6,11 +6,11 @@ import logging
 import json
 from datetime import datetime
 from flask import Blueprint, render_template, request, jsonify
-from pymongo import MongoClient
 
 from app.services.ipca_promocao_service import IPCAPromocaoService
 from app.services.portal_service import PortalService
 from app.config import MONGO_URI, MONGO_URI_PRD
+from app.utils.mongo_utils import obter_cliente_mongo
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +19,9 @@ ipca_promocao_bp = Blueprint('ipca_promocao', __name__, url_prefix='/ipca-promoc
 
 def get_services():
     """Inicializar serviços"""
-    client = MongoClient(MONGO_URI)
-    db = client.sgppServices
-    client_pdb = MongoClient(MONGO_URI_PRD)
-    db_pdb = client_pdb.sgppServices
+    # Clientes compartilhados pelo processo (pool de conexões reaproveitado entre requisições)
+    db = obter_cliente_mongo(MONGO_URI).sgppServices
+    db_pdb = obter_cliente_mongo(MONGO_URI_PRD).sgppServices
     
     promocao_service = IPCAPromocaoService(db, db_pdb)
     portal_service = PortalService(MONGO_URI, MONGO_URI_PRD)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Script para criação dos índices MongoDB usados pela análise de gaps IPCA/IGPM
+Executar uma vez por ambiente (migração), de preferência fora do horário de uso:
+a criação constrói o índice no primário. A aplicação apenas consulta os índices.
+"""
+
+import sys
+import os
+import argparse
+from pymongo import MongoClient
+
+# Adicionar o diretório do projeto ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.utils.mongo_utils import INDICE_CCO_ANALISE, NOME_INDICE_CCO_ANALISE, INDICE_TAXAS, NOME_INDICE_TAXAS
+
+# Configuração padrão
+DEFAULT_MONGO_URI = "mongodb://localhost:27017/"
+
+# Índices a criar: (coleção, chaves, nome)
+INDICES = [
+    ('conta_custo_oleo_entity', INDICE_CCO_ANALISE, NOME_INDICE_CCO_ANALISE),
+    ('ipca_entity', INDICE_TAXAS, NOME_INDICE_TAXAS),
+    ('igpm_entity', INDICE_TAXAS, NOME_INDICE_TAXAS),
+]
+
+def conectar_mongodb(mongo_uri=None):
+    """Estabelece conexão com MongoDB"""
+    try:
+        uri = mongo_uri or DEFAULT_MONGO_URI
+
+        # Substituir certificado se configurado
+        ca_cert_path = os.getenv('CA_CERTIFICATE_PATH_DEFAULT', '')
+        if ca_cert_path and 'tlsCAFile=PATH_CERT' in uri:
+            uri = uri.replace('tlsCAFile=PATH_CERT', f'tlsCAFile={ca_cert_path}')
+
+        client = MongoClient(uri)
+        db = client.sgppServices
+
+        # Testar conexão
+        client.admin.command('ping')
+        return client, db
+
+    except Exception as e:
+        print(f"❌ Erro na conexão: {e}")
+        return None, None
+
+def criar_indices(db) -> bool:
+    """Cria os índices (create_index é idempotente: índices existentes são mantidos)"""
+    sucesso = True
+    for colecao, chaves, nome in INDICES:
+        try:
+            db[colecao].create_index(chaves, name=nome)
+            print(f"✓ Índice {nome} em {colecao}")
+        except Exception as e:
+            print(f"❌ Erro ao criar o índice {nome} em {colecao}: {e}")
+            sucesso = False
+    return sucesso
+
+def main():
+    parser = argparse.ArgumentParser(description='Criação dos índices MongoDB da análise IPCA/IGPM')
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI_PRD') or DEFAULT_MONGO_URI,
+                        help='URI do MongoDB (padrão: variável MONGO_URI_PRD)')
+    args = parser.parse_args()
+
+    client, db = conectar_mongodb(args.mongo_uri)
+    if db is None:
+        sys.exit(1)
+
+    try:
+        sucesso = criar_indices(db)
+    finally:
+        client.close()
+
+    sys.exit(0 if sucesso else 1)
+
+if __name__ == "__main__":
+    main()
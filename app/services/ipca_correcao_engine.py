@@ -43,6 +43,15 @@ class IPCACorrectionEngine:
         if valor is None:
             return 0.0
         
+        # Teste direto de tipo nos casos comuns, sem hasattr/try
+        tipo = valor.__class__
+        if tipo is float:
+            return valor
+        if tipo is Decimal128:
+            return float(valor.to_decimal())
+        if tipo is int:
+            return float(valor)
+        
         try:
             if hasattr(valor, 'to_decimal'):
                 return float(valor.to_decimal())
@@ -81,6 +90,7 @@ class IPCACorrectionEngine:
             if cco.get('flgRecuperado', False):
                 logger.error(f"CCO {cco_id} está recuperada - Cenário 0 pode não ser apropriado")
             correcao_anterior = None
+            self._prefetch_taxas_gaps(cco_id, gaps)
             for cco_gap in gaps:
                 if cco_gap['_id'] == cco_id:
                     for gap in cco_gap['gaps']:
@@ -276,14 +286,17 @@ class IPCACorrectionEngine:
             todas_correcoes = []
             
             # PRIMEIRA PASSADA: Adicionar correções originais (atualizadas se necessário)
+            # (períodos já cobertos registrados na mesma passada)
+            periodos_existentes = set()
             for correcao_orig in correcoes_originais:
                 data_correcao = self.gap_analyzer._extrair_data_correcao(correcao_orig)
                 if data_correcao:
                     chave = (data_correcao.year, data_correcao.month)
+                    periodos_existentes.add(chave)
                     
-                    if chave in updates_map:
+                    update = updates_map.get(chave)
+                    if update is not None:
                         # Esta correção será atualizada
-                        update = updates_map[chave]
                         correcao_atualizada = correcao_orig.copy()
                         correcao_atualizada['valorReconhecidoComOH'] = Decimal128(str(update.get('proposed_value', 0)))
                         correcao_atualizada['observacoes'] = update.get('description', '') + f" - Recalculado em {datetime.now().strftime('%d/%m/%Y')}"
@@ -303,11 +316,6 @@ class IPCACorrectionEngine:
                         })
             
             # SEGUNDA PASSADA: Adicionar gaps apenas se não existir correção para aquele período
-            periodos_existentes = set()
-            for item in todas_correcoes:
-                data = item['data']
-                periodos_existentes.add((data.year, data.month))
-            
             for chave, gap_correcao in gaps_map.items():
                 if chave not in periodos_existentes:
                     # Reconstruir data do gap para ordenação
@@ -430,6 +438,7 @@ class IPCACorrectionEngine:
             # 1. Calcular correções para gaps (igual ao Cenário 0)
             gaps_correcoes = []
             correcao_anterior = None
+            self._prefetch_taxas_gaps(cco_id, gaps)
             for cco_gap in gaps:
                 if cco_gap['_id'] == cco_id:
                     for gap in cco_gap['gaps']:
@@ -613,6 +622,7 @@ class IPCACorrectionEngine:
             # 1. Calcular correções para gaps
             gaps_correcoes = []
             correcao_anterior = None
+            self._prefetch_taxas_gaps(cco_id, gaps)
             for cco_gap in gaps:
                 if cco_gap['_id'] == cco_id:
                     for gap in cco_gap['gaps']:
@@ -1299,6 +1309,18 @@ class IPCACorrectionEngine:
                 'correcoes_validadas': 0
             }
     
+    def _prefetch_taxas_gaps(self, cco_id: str, gaps: List[Dict[str, Any]]) -> None:
+        """
+        Carrega de uma vez (uma consulta) as taxas IPCA de todos os gaps da CCO
+        """
+        periodos = [
+            self.gap_analyzer._calcular_mes_taxa_aplicacao(gap['ano'], gap['mes'])
+            for cco_gap in gaps if cco_gap['_id'] == cco_id
+            for gap in cco_gap['gaps']
+        ]
+        if periodos:
+            self.gap_analyzer._prefetch_taxas(periodos, 'IPCA')
+    
     def _calcular_correcao_individual_gap(self, cco: Dict[str, Any], gap: Dict[str, Any], correcao_anterior: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Calcula correção individual para um gap específico
@@ -10,8 +10,16 @@ from enum import Enum
 from dataclasses import dataclass, asdict
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
+# Abaixo deste volume de propostas o custo fixo do NumPy não compensa
+LIMITE_AGREGACAO_VETORIZADA = 64
+
 class CorrectionStatus(Enum):
     """Status da sessão de correção"""
     ANALYZING = "ANALYZING"
@@ -31,7 +39,10 @@ class CorrectionType(Enum):
     DUPLICATA_ADJUSTMENT = "DUPLICATA_ADJUSTMENT"  # Ajuste de duplicatas
     CORRECTION_DATE_CHANGE = "CORRECTION_DATE_CHANGE"  # Alteração de data de correção
 
-@dataclass
+# Código numérico de cada tipo, usado nas agregações vetorizadas
+CODIGO_TIPO_CORRECAO = {tipo: codigo for codigo, tipo in enumerate(CorrectionType)}
+
+@dataclass(slots=True)
 class CorrectionProposal:
     """Proposta de correção individual"""
     correction_id: str
@@ -84,6 +95,31 @@ class CorrectionSession:
         result['corrections_proposed'] = [cp.to_dict() for cp in self.corrections_proposed]
         return result
 
+def _criar_proposta_remocao(correction_id: str, periodo: str, valor: float, descricao: str) -> CorrectionProposal:
+    """Proposta de remoção de correção duplicada"""
+    return CorrectionProposal(
+        correction_id, CorrectionType.DUPLICATA_REMOVAL, "CENARIO_DUPLICATAS",
+        datetime.now(timezone.utc), periodo, valor, 0, -valor, 1.0, 'N/A',
+        descricao, [], ['CENARIO_DUPLICATAS_REMOCAO']
+    )
+
+def _criar_proposta_ajuste(correction_id: str, valor_proposto: float, impacto: float,
+                           descricao: str, dependencias: List[str]) -> CorrectionProposal:
+    """Proposta de ajuste compensatório pela remoção de duplicatas"""
+    return CorrectionProposal(
+        correction_id, CorrectionType.DUPLICATA_ADJUSTMENT, "CENARIO_DUPLICATAS",
+        datetime.now(timezone.utc), 'AJUSTE', 0, valor_proposto, impacto, 1.0, 'N/A',
+        descricao, dependencias, ['CENARIO_DUPLICATAS_AJUSTE']
+    )
+
+def _criar_proposta_reativacao(correction_id: str, valor: float, dependencias: List[str]) -> CorrectionProposal:
+    """Proposta de reativação da CCO após remoção de duplicatas"""
+    return CorrectionProposal(
+        correction_id, CorrectionType.REACTIVATION, "CENARIO_DUPLICATAS",
+        datetime.now(timezone.utc), 'REATIVACAO', 0, valor, valor, 1.0, 'N/A',
+        "Reativação da CCO após remoção de duplicatas", dependencias, ['CENARIO_DUPLICATAS_REATIVACAO']
+    )
+
 class IPCACorrectionOrchestrator:
     """
     Coordenador principal do sistema de correção IPCA/IGPM
@@ -513,11 +549,12 @@ class IPCACorrectionOrchestrator:
             gap_mais_antigo = min(datas_gaps)
             
             # Verificar se há correções IPCA/IGPM posteriores ao gap mais antigo
-            for correcao in correcoes_monetarias:
-                if correcao.get('tipo') in ['IPCA', 'IGPM']:
-                    data_correcao = self.gap_analyzer._extrair_data_correcao(correcao)
-                    if data_correcao and data_correcao > gap_mais_antigo:
-                        return True
+            # (apenas anos a partir do gap precisam ser consultados)
+            for ano, correcoes_ano in self.gap_analyzer._index_correcoes(cco).todas_por_ano.items():
+                if ano < gap_mais_antigo.year:
+                    continue
+                if any(data_correcao > gap_mais_antigo for data_correcao, _ in correcoes_ano):
+                    return True
             
             return False
             
@@ -708,102 +745,85 @@ class IPCACorrectionOrchestrator:
                 if i > duplicata['indice'] and correcao.get('tipo') in ['IPCA', 'IGPM']:
                     data_correcao = self.gap_analyzer._extrair_data_correcao(correcao)
                     if data_correcao and data_correcao > data_duplicata:
-                        periodo = f"{data_correcao.month:02d}/{data_correcao.year}",
+                        periodo = f"{data_correcao.month:02d}/{data_correcao.year}"
                         diferenca = self.gap_analyzer._converter_decimal128_para_float(correcao.get('diferencaValor', 0))
                         taxa = self.gap_analyzer._converter_decimal128_para_float(
                             correcao.get('taxaCorrecao', 1.0)
                         )
-                        correcoes_posteriores.append({
-                            'periodo': periodo,
-                            'diferenca': diferenca,
-                            'taxa': taxa
-                        })
+                        # (periodo, diferenca, taxa)
+                        correcoes_posteriores.append((periodo, diferenca, taxa))
                         
             # Calcular efeito cascata
             valor_cascata = diferenca_duplicata
-            for cp in correcoes_posteriores:
-                valor_cascata *= cp['taxa']
+            for _, _, taxa in correcoes_posteriores:
+                valor_cascata *= taxa
             
             valor_compensacao_total += valor_cascata
             
             # Criar proposta de remoção da duplicata
-            proposta_remocao = CorrectionProposal(
-                correction_id=str(uuid.uuid4()),
-                type=CorrectionType.DUPLICATA_REMOVAL,  # Novo tipo
-                scenario="CENARIO_DUPLICATAS",
-                target_date=datetime.now(timezone.utc),
-                target_period=duplicata['periodo'],
-                current_value=duplicata['valor_duplicado'],  # Valor que será removido
-                proposed_value=0,  # Valor final (zero após remoção)
-                impact=-duplicata['valor_duplicado'],  # Impacto negativo
-                taxa_aplicada=1.0,
-                taxa_referencia='N/A',
-                description=f"Remoção de correção IPCA duplicada - período {duplicata['periodo']} na data {data_duplicata}",
-                dependencies=[],
-                business_rules_applied=['CENARIO_DUPLICATAS_REMOCAO']
+            # Valor atual é removido (valor final zero, impacto negativo)
+            proposta_remocao = _criar_proposta_remocao(
+                str(uuid.uuid4()),
+                duplicata['periodo'],
+                duplicata['valor_duplicado'],
+                f"Remoção de correção IPCA duplicada - período {duplicata['periodo']} na data {data_duplicata}"
             )
             
             if correcoes_posteriores and len(correcoes_posteriores) > 0:
-                proposta_remocao.taxas_recalculadas = correcoes_posteriores
+                proposta_remocao.taxas_recalculadas = self._taxas_recalculadas_para_dict(correcoes_posteriores)
             
             proposta_remocao.indice_remover = duplicata['indice']
             propostas.append(proposta_remocao)
         
         # Verificar necessidade de ajuste final
         valor_total_removido = sum(dup['valor_duplicado'] for dup in duplicatas)
-        print(f"_gerar_propostas_cenario_duplicatas: Valor total removido: {valor_total_removido}")
-        print(f"_gerar_propostas_cenario_duplicatas: Valor compensação total: {valor_compensacao_total}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("_gerar_propostas_cenario_duplicatas: removido=%s compensacao=%s",
+                         valor_total_removido, valor_compensacao_total)
         
         if valor_total_removido > 0 or valor_compensacao_total > 0:
             # Proposta de ajuste compensatório
-            proposta_ajuste = CorrectionProposal(
-                correction_id=str(uuid.uuid4()),
-                type=CorrectionType.DUPLICATA_ADJUSTMENT,  # Novo tipo
-                scenario="CENARIO_DUPLICATAS",
-                target_date=datetime.now(timezone.utc),
-                target_period='AJUSTE',
-                current_value=0,
-                proposed_value= -valor_compensacao_total if valor_compensacao_total > valor_total_removido else -valor_total_removido,  # Ajuste negativo
-                impact=-valor_compensacao_total,
-                taxa_aplicada=1.0,
-                taxa_referencia='N/A',
-                description=f"Ajuste compensatório por remoção de {len(duplicatas)} duplicata(s)",
-                dependencies=[p.correction_id for p in propostas],  # Depende das remoções
-                business_rules_applied=['CENARIO_DUPLICATAS_AJUSTE']
+            proposta_ajuste = _criar_proposta_ajuste(
+                str(uuid.uuid4()),
+                -valor_compensacao_total if valor_compensacao_total > valor_total_removido else -valor_total_removido,  # Ajuste negativo
+                -valor_compensacao_total,
+                f"Ajuste compensatório por remoção de {len(duplicatas)} duplicata(s)",
+                [p.correction_id for p in propostas]  # Depende das remoções
             )
             
             if correcoes_posteriores and len(correcoes_posteriores) > 0:
-                proposta_ajuste.taxas_recalculadas = correcoes_posteriores
+                proposta_ajuste.taxas_recalculadas = self._taxas_recalculadas_para_dict(correcoes_posteriores)
                 proposta_ajuste.description += f". Efeito cascata aplicado sobre {len(correcoes_posteriores)} correção(ões) posterior(es)"
                 # iterar sobre as correções posteriores e adicionar ao description
-                for cp in correcoes_posteriores:
-                    proposta_ajuste.description += f". {cp['periodo']} (taxa {cp['taxa']:.4f}): R$ {cp['diferenca']:.2f}"
+                for periodo, diferenca, taxa in correcoes_posteriores:
+                    proposta_ajuste.description += f". {periodo} (taxa {taxa:.4f}): R$ {diferenca:.2f}"
             
             propostas.append(proposta_ajuste)
         
         # Verificar necessidade de reativação
-        valor_final_estimado = self._estimar_valor_final_apos_duplicatas(cco, valor_compensacao_total)
-        if cco.get('flgRecuperado', False) and valor_final_estimado != 0:
-            proposta_reativacao = CorrectionProposal(
-                correction_id=str(uuid.uuid4()),
-                type=CorrectionType.REACTIVATION,
-                scenario="CENARIO_DUPLICATAS",
-                target_date=datetime.now(timezone.utc),
-                target_period='REATIVACAO',
-                current_value=0,
-                proposed_value=valor_final_estimado,
-                impact=valor_final_estimado,  # Não impacta valor monetário
-                taxa_aplicada=1.0,
-                taxa_referencia='N/A',
-                description=f"Reativação da CCO após remoção de duplicatas",
-                dependencies=[p.correction_id for p in propostas],
-                business_rules_applied=['CENARIO_DUPLICATAS_REATIVACAO']
+        valor_final_estimado = 0
+        if cco.get('flgRecuperado', False):
+            valor_final_estimado = self._estimar_valor_final_apos_duplicatas(cco, valor_compensacao_total)
+        if valor_final_estimado != 0:
+            proposta_reativacao = _criar_proposta_reativacao(
+                str(uuid.uuid4()),
+                valor_final_estimado,
+                [p.correction_id for p in propostas]
             )
             propostas.append(proposta_reativacao)
         
         return propostas
     
     
+    def _taxas_recalculadas_para_dict(self, correcoes_posteriores: List[Tuple[str, float, float]]) -> List[Dict[str, Any]]:
+        """
+        Converte as tuplas (periodo, diferenca, taxa) no formato persistido na proposta
+        """
+        return [
+            {'periodo': periodo, 'diferenca': diferenca, 'taxa': taxa}
+            for periodo, diferenca, taxa in correcoes_posteriores
+        ]
+    
     def _estimar_valor_final_apos_duplicatas(self, cco: Dict[str, Any], valor_total_removido: float) -> float:
         """
         Estima valor final da CCO após remoção das duplicatas
@@ -820,11 +840,18 @@ class IPCACorrectionOrchestrator:
         if not propostas:
             return {'total_impact': 0.0, 'total_additions': 0.0, 'total_updates': 0.0}
         
-        total_impact = sum(p.impact for p in propostas if (p.type == CorrectionType.IPCA_ADDITION or p.type == CorrectionType.IPCA_UPDATE))
-        total_additions = sum(p.impact for p in propostas if p.type == CorrectionType.IPCA_ADDITION)
-        total_updates = sum(p.impact for p in propostas if p.type == CorrectionType.IPCA_UPDATE)
-        
-        total_remove = sum(p.proposed_value for p in propostas if p.type == CorrectionType.DUPLICATA_ADJUSTMENT)
+        if np is not None and len(propostas) >= LIMITE_AGREGACAO_VETORIZADA:
+            impacts, proposed_values, types = self._vetorizar_propostas(propostas)
+            total_additions = float(impacts[types == CODIGO_TIPO_CORRECAO[CorrectionType.IPCA_ADDITION]].sum())
+            total_updates = float(impacts[types == CODIGO_TIPO_CORRECAO[CorrectionType.IPCA_UPDATE]].sum())
+            total_remove = float(proposed_values[types == CODIGO_TIPO_CORRECAO[CorrectionType.DUPLICATA_ADJUSTMENT]].sum())
+            total_impact = total_additions + total_updates
+        else:
+            total_impact = sum(p.impact for p in propostas if (p.type == CorrectionType.IPCA_ADDITION or p.type == CorrectionType.IPCA_UPDATE))
+            total_additions = sum(p.impact for p in propostas if p.type == CorrectionType.IPCA_ADDITION)
+            total_updates = sum(p.impact for p in propostas if p.type == CorrectionType.IPCA_UPDATE)
+            
+            total_remove = sum(p.proposed_value for p in propostas if p.type == CorrectionType.DUPLICATA_ADJUSTMENT)
         
         return {
             'total_impact': total_impact + total_remove,
@@ -834,6 +861,16 @@ class IPCACorrectionOrchestrator:
             'proposals_count': len(propostas)
         }
     
+    def _vetorizar_propostas(self, propostas: List[CorrectionProposal]) -> Tuple[Any, Any, Any]:
+        """
+        Materializa impactos, valores propostos e tipos das propostas em arrays NumPy
+        """
+        total = len(propostas)
+        impacts = np.fromiter((p.impact for p in propostas), dtype=np.float64, count=total)
+        proposed_values = np.fromiter((p.proposed_value for p in propostas), dtype=np.float64, count=total)
+        types = np.fromiter((CODIGO_TIPO_CORRECAO[p.type] for p in propostas), dtype=np.int8, count=total)
+        return impacts, proposed_values, types
+    
     def _gerar_preview_data(self, session: CorrectionSession) -> Dict[str, Any]:
         """
         Gera dados para preview das correções
@@ -851,19 +888,25 @@ class IPCACorrectionOrchestrator:
         """
         Gera preview final das correções aprovadas
         """
-        approved_proposals = [
-            p for p in session.corrections_proposed 
-            if p.correction_id in session.corrections_approved
-        ]
+        approved_ids = set(session.corrections_approved)
+        approved_proposals = []
         
+        # Passagem única: separa aprovadas e acumula os impactos por tipo
+        tem_compensacao = False
+        total_compensacao = 0.0
+        total_ipca = 0.0
+        for p in session.corrections_proposed:
+            if p.correction_id not in approved_ids:
+                continue
+            approved_proposals.append(p)
+            if p.type is CorrectionType.COMPENSATION:
+                tem_compensacao = True
+                total_compensacao += p.impact
+            elif p.type is CorrectionType.IPCA_ADDITION or p.type is CorrectionType.IPCA_UPDATE:
+                total_ipca += p.impact
         
-        total_financial_impact = 0
-        # verificar se existe alguma correção do tipo COMPENSATION
-        if any(p.type == CorrectionType.COMPENSATION for p in approved_proposals):
-            total_financial_impact = sum(p.impact for p in approved_proposals if (p.type == CorrectionType.COMPENSATION))
-        
-        else:
-            total_financial_impact = sum(p.impact for p in approved_proposals if (p.type == CorrectionType.IPCA_ADDITION or p.type == CorrectionType.IPCA_UPDATE))
+        # Havendo correção do tipo COMPENSATION, apenas ela compõe o impacto
+        total_financial_impact = total_compensacao if tem_compensacao else total_ipca
         
         return {
             'approved_corrections': [p.to_dict() for p in approved_proposals],
@@ -996,12 +1039,8 @@ class IPCACorrectionOrchestrator:
 
     def _existe_correcao_ano_vigente(self, cco: Dict[str, Any], ano: int, mes: int) -> bool:
         """Verifica se já existe correção IPCA/IGPM para o período"""
-        for correcao in cco.get('correcoesMonetarias', []):
-            if correcao.get('tipo') in ['IPCA', 'IGPM']:
-                data_correcao = self.gap_analyzer._extrair_data_correcao(correcao)
-                if data_correcao and data_correcao.year == ano and data_correcao.month == mes:
-                    return True
-        return False
+        indice = self.gap_analyzer._index_correcoes(cco)
+        return (ano, mes) in indice.ipca or (ano, mes) in indice.igpm
 
     def _calcular_proposta_ipca_vigente(self, cco: Dict[str, Any], ano: int, mes: int, valor_atual: float) -> Dict[str, Any]:
         """Calcula proposta de correção IPCA para ano vigente"""
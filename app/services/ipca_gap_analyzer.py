@@ -3,17 +3,392 @@ Analisador de Gaps IPCA/IGPM
 Utilitário para identificar CCOs que precisam de correção monetária baseado na regra de aniversário.
 """
 
+import heapq
+import io
 import logging
-from datetime import datetime, timezone
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
-from bson import ObjectId
-from typing import Dict, Any, List, Optional, Tuple
+import bson
+from bson import Decimal128, ObjectId
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import csv
+import gzip
 import json
 from app.config import IGNORAR_CORECAO_MONETARIA_VALOR_NEGATIVO
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 logger = logging.getLogger(__name__)
 
+# Campos da CCO lidos pela análise de gaps (demais campos não trafegam do MongoDB)
+PROJECAO_CCO_ANALISE = {
+    '_id': 1, 'contratoCpp': 1, 'campo': 1, 'remessa': 1, 'remessaExposicao': 1,
+    'faseRemessa': 1, 'dataReconhecimento': 1, 'anoReconhecimento': 1, 'origemDosGastos': 1,
+    'correcoesMonetarias': 1, 'valorReconhecidoComOH': 1, 'flgRecuperado': 1
+}
+
+# Filtros aceitos pela análise de gaps, aplicados como igualdade na query
+CAMPOS_FILTRO_ANALISE = ('_id', 'contratoCpp', 'campo', 'anoReconhecimento', 'origemDosGastos')
+
+
+# Lote das consultas de taxas: séries mensais completas cabem em um único lote (sem getMore)
+TAMANHO_LOTE_TAXAS = 1000
+
+# Colunas do CSV de gaps/correções fora do período/duplicatas
+CAMPOS_CSV_GAPS = [
+    'cco_id', 'contrato', 'campo', 'remessa', 'fase', 
+    'data_reconhecimento', 'valor_atual', 'tipo_problema',
+    # Campos de gap
+    'gap_ano', 'gap_mes', 'gap_data_aniversario', 
+    'gap_valor_base', 'gap_prioridade',
+    # Campos de correção fora do período
+    'correcao_ano_aniversario', 'correcao_mes_aniversario',
+    'correcao_ano_aplicado', 'correcao_mes_aplicado',
+    'data_limite_aplicacao', 'data_efetiva_aplicacao', 'dias_atraso',
+    'tipo_correcao', 'taxa_aplicada', 'taxa_esperada',
+    'diferenca_taxa', 'necessita_ajuste',
+    # NOVOS CAMPOS: Alterações no período
+    'teve_alteracoes_no_periodo', 'qtd_alteracoes_no_periodo',
+    'valor_base_original', 'valor_base_na_aplicacao',
+    'tipos_alteracoes_encontradas', 'datas_alteracoes',
+    'valores_impacto_alteracoes', 'impacto_total_alteracoes',
+    'duplicata_periodo', 'duplicata_valor_removido'
+]
+
+# Blocos vazios das linhas do CSV (tuplas na ordem de CAMPOS_CSV_GAPS): cada tipo de
+# problema preenche os 8 campos da CCO e apenas o seu bloco
+_CSV_VAZIO_GAP = ('',) * 5
+_CSV_VAZIO_CORRECAO = ('',) * 20
+_CSV_VAZIO_DUPLICATA = ('',) * 2
+
+# Campos obrigatórios da correção fora do período, na ordem das colunas do CSV
+_CAMPOS_CSV_CORRECAO_FORA = itemgetter(
+    'ano_aniversario', 'mes_aniversario', 'ano_aplicado', 'mes_aplicado',
+    'data_limite', 'data_aplicacao', 'dias_atraso', 'tipo_correcao',
+    'taxa_aplicada', 'taxa_esperada', 'diferenca_taxa', 'necessita_ajuste',
+)
+
+# Buffer de escrita dos arquivos exportados
+TAMANHO_BUFFER_EXPORTACAO = 1 << 20
+
+# Tamanho de lista a partir do qual a exportação JSON (orjson) serializa item a item
+LIMITE_JSON_EM_PARTES = 1000
+
+# Nível de compressão da exportação JSON compactada (gzip/zstd): rápido, boa taxa para JSON
+NIVEL_COMPRESSAO_JSON = 3
+
+# Quantidade de análises (por filtro) mantidas pelo gerador de relatórios
+TAMANHO_CACHE_ANALISES_RELATORIO = 32
+
+# Chave de ordenação/busca dos pares (data, correção) do índice
+_DATA_DO_PAR = itemgetter(0)
+# Chaves de ordenação/extração das estruturas de correção
+_DATA_DA_CORRECAO = itemgetter('data_correcao')
+_IMPACTO_DA_ALTERACAO = itemgetter('valor_impacto')
+# Chave de ordenação dos itens (chave, quantidade) das estatísticas
+_QUANTIDADE_DO_ITEM = itemgetter(1)
+
+# Sufixo de timezone sem dois pontos (ex: '2025-07-28T17:28:13-0300')
+_TZ_SUFFIX_RE = re.compile(r'[+-]\d{4}$')
+
+# Taxas publicadas (fator por (ano, mes, tipo)) por banco, compartilhadas entre instâncias do processo.
+# Só guarda taxas encontradas: períodos ainda sem taxa voltam a ser consultados em novas instâncias.
+# Taxas revisadas (nova versão) passam a valer após VALIDADE_TAXAS_PUBLICADAS_S ou limpar_taxas_publicadas()
+VALIDADE_TAXAS_PUBLICADAS_S = 900
+# {(nome do banco, cliente): (instante da carga, {(ano, mes, tipo): fator})}, sem referências a Database/MongoClient
+_TAXAS_PUBLICADAS: Dict[Tuple[str, str], Tuple[float, Dict[Tuple[int, int, str], float]]] = {}
+
+
+def limpar_taxas_publicadas() -> None:
+    """
+    Descarta as taxas publicadas compartilhadas (usar quando taxas forem cadastradas ou revisadas)
+    """
+    _TAXAS_PUBLICADAS.clear()
+
+
+def _taxas_publicadas_do_banco(db) -> Dict[Tuple[int, int, str], float]:
+    """
+    Cache de taxas publicadas do banco informado, renovado a cada VALIDADE_TAXAS_PUBLICADAS_S
+    (dicionário vazio avulso se o banco não puder ser identificado)
+    """
+    try:
+        chave = (db.name, repr(db.client))
+    except Exception:
+        return {}
+    
+    agora = time.monotonic()
+    registro = _TAXAS_PUBLICADAS.get(chave)
+    if registro is None or agora - registro[0] > VALIDADE_TAXAS_PUBLICADAS_S:
+        registro = (agora, {})
+        _TAXAS_PUBLICADAS[chave] = registro
+    return registro[1]
+
+
+@lru_cache(maxsize=4096)
+def _converter_data_iso_com_tz(data_str: str) -> datetime:
+    """
+    Converte data ISO (string) para datetime com timezone, assumindo UTC quando ausente
+
+    As mesmas datas são lidas várias vezes por CCO, por isso o resultado é memoizado.
+    Strings inválidas propagam a exceção (não são cacheadas).
+    """
+    # Parser em C, aceita o sufixo -0300 sem ajuste; formatos que ele recusa seguem o caminho padrão
+    if ciso8601 is not None:
+        try:
+            dt = ciso8601.parse_datetime(data_str)
+            return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    
+    # Se tem timezone no formato -HHMM ou +HHMM, adicionar dois pontos
+    if _TZ_SUFFIX_RE.search(data_str):
+        # Converter -0300 para -03:00
+        data_str = data_str[:-2] + ':' + data_str[-2:]
+    
+    # Converter para datetime com timezone
+    dt = datetime.fromisoformat(data_str)
+    
+    # Se não tem timezone, assumir UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _para_float(valor) -> float:
+    """
+    Converte Decimal128 (ou número) para float de forma segura; None e inválidos viram 0.0
+
+    Função de módulo para os laços da análise (sem custo de chamada de método).
+    """
+    if valor is None:
+        return 0.0
+    
+    # Teste direto de tipo nos casos comuns, sem hasattr/try
+    tipo = valor.__class__
+    if tipo is float:
+        return valor
+    if tipo is Decimal128:
+        return float(valor.to_decimal())
+    if tipo is int:
+        return float(valor)
+    
+    try:
+        if hasattr(valor, 'to_decimal'):
+            return float(valor.to_decimal())
+        return float(valor)
+    except Exception:
+        return 0.0
+
+
+def _fatores_por_periodo(documentos) -> Dict[Tuple[int, int], float]:
+    """
+    Converte documentos de taxa em fator por (ano, mes) (ex: 4.47% -> 1.0447)
+
+    Períodos com mais de um documento ficam com o primeiro, a mesma regra do find_one
+    usado na consulta individual (_consultar_taxa_fator).
+    """
+    fatores = {}
+    for documento in documentos:
+        chave = (documento['anoReferencia'], documento['mesReferencia'])
+        if chave not in fatores:
+            fatores[chave] = 1 + (_para_float(documento['valor']) / 100)
+    return fatores
+
+
+@lru_cache(maxsize=8192)
+def _data_utc(ano: int, mes: int, dia: int, hora: int = 0, minuto: int = 0, segundo: int = 0) -> datetime:
+    """
+    Datetime UTC memoizado (datas de aniversário/limite se repetem em todas as CCOs)
+    """
+    return datetime(ano, mes, dia, hora, minuto, segundo, tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=8192)
+def _mes_ano_str(ano: int, mes: int) -> str:
+    """
+    Período no formato MM/AAAA, memoizado
+    """
+    return f"{mes:02d}/{ano}"
+
+
+def _gaps_com_valor(gaps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Filtra os gaps com valor base diferente de zero (os de valor zero não têm impacto)
+    """
+    return [gap for gap in gaps if gap.get('valor_base')]
+
+
+# Máscara de permissões do processo (lida uma vez), aplicada aos arquivos exportados
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def _abrir_para_substituicao(caminho: str, modo: str, **kwargs):
+    """
+    Escreve em um arquivo temporário ao lado de caminho e o move para caminho ao final
+
+    A troca via os.replace é atômica: em caso de erro o arquivo anterior (se houver)
+    permanece intacto e o temporário é removido. O temporário tem nome único, então
+    exportações simultâneas para o mesmo caminho não escrevem no mesmo arquivo.
+    """
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho) or '.', suffix='.tmp')
+    try:
+        # mkstemp cria o arquivo só para o dono: mesmas permissões de um open() comum
+        os.chmod(temporario, 0o666 & ~_UMASK)
+        with open(descritor, modo, **kwargs) as arquivo:
+            yield arquivo
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.unlink(temporario)
+        except OSError:
+            pass
+        raise
+
+
+def _decodificar_lotes_bson(lotes: Iterable[bytes], codec_options) -> Iterator[Dict[str, Any]]:
+    """
+    Decodifica os lotes BSON brutos de find_raw_batches em documentos (dict)
+    """
+    for lote in lotes:
+        yield from bson.decode_all(lote, codec_options)
+
+
+def _iterar_em_segundo_plano(iteravel: Iterable, tamanho_lote: int, max_lotes: int = 4) -> Iterator:
+    """
+    Percorre o iterável em uma thread produtora, em lotes, enquanto o chamador processa os itens
+
+    Sobrepõe a leitura (ex: getMore do cursor MongoDB) ao processamento. A fila é limitada a
+    max_lotes lotes; exceções da leitura são relançadas no consumidor.
+    """
+    fila = queue.Queue(maxsize=max_lotes)
+    parar = threading.Event()
+    fim = object()
+
+    def _enfileirar(item) -> bool:
+        while not parar.is_set():
+            try:
+                fila.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produzir():
+        iterador = iter(iteravel)
+        try:
+            while not parar.is_set():
+                lote = list(islice(iterador, tamanho_lote))
+                if not lote:
+                    break
+                if not _enfileirar(lote):
+                    return
+        except Exception as e:
+            _enfileirar(e)
+            return
+        _enfileirar(fim)
+
+    produtor = threading.Thread(target=_produzir, name='leitura-ccos', daemon=True)
+    produtor.start()
+    try:
+        while True:
+            lote = fila.get()
+            if lote is fim:
+                break
+            if isinstance(lote, Exception):
+                raise lote
+            yield from lote
+    finally:
+        parar.set()
+        produtor.join()
+
+
+# Quantidade mínima de gaps para compensar o custo de despacho da agregação compilada/vetorizada
+LIMITE_AGREGACAO_JIT = 1000
+
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _agregar_impacto(valores, ano_ids, contrato_ids, taxa, n_contratos, n_anos):
+        """
+        Soma o impacto (valor_base * taxa) no total, por contrato e por ano
+
+        ano_ids/contrato_ids são índices (0..n-1) atribuídos no lado Python
+        """
+        total = 0.0
+        por_contrato = np.zeros(n_contratos)
+        por_ano = np.zeros(n_anos)
+        for i in range(valores.shape[0]):
+            impacto = valores[i] * taxa
+            total += impacto
+            por_contrato[contrato_ids[i]] += impacto
+            por_ano[ano_ids[i]] += impacto
+        return total, por_contrato, por_ano
+elif np is not None:
+    def _agregar_impacto(valores, ano_ids, contrato_ids, taxa, n_contratos, n_anos):
+        """
+        Versão NumPy (sem Numba): multiplicação vetorizada e somas agrupadas via bincount
+        """
+        impactos = valores * taxa
+        por_contrato = np.bincount(contrato_ids, weights=impactos, minlength=n_contratos)
+        por_ano = np.bincount(ano_ids, weights=impactos, minlength=n_anos)
+        return impactos.sum(), por_contrato, por_ano
+else:
+    _agregar_impacto = None
+
+
+@dataclass(frozen=True, slots=True)
+class _IndiceCorrecoesCCO:
+    """
+    Índice das correções IPCA/IGPM de uma CCO, montado uma vez e consultado pelos _mapear_*/_recuperar_*
+    """
+    ipca: Dict[Tuple[int, int], Dict[str, Any]]  # {(ano, mes): correcao}, primeira do período
+    igpm: Dict[Tuple[int, int], Dict[str, Any]]
+    todas_por_ano: Dict[int, List[Tuple[datetime, Dict[str, Any]]]]  # {ano: [(data_correcao, correcao)]}
+    por_ano: Dict[int, List[Dict[str, Any]]]  # {ano: [info]} ordenado por data
+    ts_por_ano: Dict[int, List[float]]  # timestamps paralelos a por_ano
+    mapeadas: Dict[Tuple[int, int], Dict[str, Any]]  # {(ano, mes): info}, última do período
+    datadas: List[Tuple[datetime, Dict[str, Any]]]  # todas as correções com data, ordem cronológica estável
+    sequencia: List[Tuple[datetime, Dict[str, Any]]]  # mesmas correções, na ordem da lista
+    duplicadas: List[Tuple[int, datetime, Dict[str, Any]]]  # (posição, data, correcao) posteriores à primeira do período
+
+
 class IPCAGapAnalyzer:
     """
     Analisador de gaps de correção IPCA/IGPM
@@ -24,7 +399,8 @@ class IPCAGapAnalyzer:
         Inicializa o analisador
         
         Args:
-            db_connection: Conexão com MongoDB
+            db_connection: Conexão com MongoDB (banco de um cliente compartilhado,
+                ver app.utils.mongo_utils.obter_cliente_mongo)
         """
         self.db = db_connection
         self.db_prd = db_connection_prd
@@ -33,6 +409,30 @@ class IPCAGapAnalyzer:
         # 0 = mesmo mês, -1 = mês anterior, +1 = mês posterior
         self.OFFSET_MES_TAXA_APLICACAO = -1  # Atualmente: mês anterior ao aniversário
         
+        # Leitura das CCOs na análise: documentos por lote (getMore) e limite de tempo no servidor
+        # (None = sem limite). Para CCOs com históricos muito longos, reduzir o lote (ex: 500)
+        self.CURSOR_BATCH_SIZE = 2000
+        self.CURSOR_MAX_TIME_MS = None
+        # Leitura do cursor em thread dedicada, sobreposta à análise das CCOs
+        self.LEITURA_CCOS_EM_SEGUNDO_PLANO = True
+        # Leitura via find_raw_batches + bson.decode_all (um decode em C por lote)
+        self.LEITURA_CCOS_RAW_BATCHES = True
+        
+        # Índice de correções da CCO em análise (válido apenas durante _analisar_cco_individual)
+        self._cco_em_analise: Optional[Dict[str, Any]] = None
+        self._indice_em_analise: Optional[_IndiceCorrecoesCCO] = None
+        
+        # Cache de taxas (fator) por (ano, mes, tipo), inclusive períodos sem taxa (None),
+        # iniciado com as taxas já publicadas carregadas por outras instâncias no processo
+        self._taxas_publicadas = _taxas_publicadas_do_banco(self.db)
+        self._taxa_cache: Dict[Tuple[int, int, str], Optional[float]] = dict(self._taxas_publicadas)
+        
+        # Limites de prioridade derivados da última data de referência usada
+        self._limites_prioridade: Optional[Tuple[datetime, datetime, datetime]] = None
+        
+        # Contagens ordenadas das estatísticas, compartilhadas entre relatórios da mesma análise
+        self._estatisticas_ordenadas: Optional[Tuple[Dict[str, Any], Dict[Tuple[str, bool], List[Tuple[Any, int]]]]] = None
+        
      
     def _calcular_mes_taxa_aplicacao(self, ano_aniversario: int, mes_aniversario: int) -> tuple:
         """
@@ -71,137 +471,165 @@ class IPCAGapAnalyzer:
             Relatório completo de gaps
         """
         try:
-            #Ordenação
-            sort = [('contratoCpp', 1),  ('campo', 1),('dataReconhecimento', 1)]
-            
-            # Query base: CCOs ativas (não totalmente recuperadas)
-            query = {
-                # '$or': [
-                #     {'flgRecuperado': False},
-                #     {'flgRecuperado': {'$exists': False}}
-                # ]
+            data_atual = datetime.now(timezone.utc)
+            resultado = {
+                'data_analise': data_atual.isoformat(),
+                'filtros_aplicados': filtros or {},
+                'estatisticas': None,
+                'ccos_com_gaps': [],
+                'ccos_com_correcoes_fora_periodo': [],
+                'ccos_com_duplicatas': []
             }
             
-            # Aplicar filtros específicos
-            if filtros:
-                if filtros.get('_id'):
-                    query['_id'] = filtros['_id']
-                if filtros.get('contratoCpp'):
-                    query['contratoCpp'] = filtros['contratoCpp']
-                if filtros.get('campo'):
-                    query['campo'] = filtros['campo']
-                if filtros.get('anoReconhecimento'):
-                    query['anoReconhecimento'] = filtros['anoReconhecimento']
-                if filtros.get('origemDosGastos'):
-                    query['origemDosGastos'] = filtros['origemDosGastos']
+            # Estatísticas chegam por último, as demais chaves acumulam os itens por CCO
+            for chave, item in self.iterar_gaps_sistema(filtros, data_atual):
+                if chave == 'estatisticas':
+                    resultado['estatisticas'] = item
+                else:
+                    resultado[chave].append(item)
+            
+            return resultado
             
-            # Executar análise
+        except Exception as e:
+            logger.error(f"Erro ao analisar gaps do sistema: {e}")
+            return {'error': str(e)}
+    
+    def iterar_gaps_sistema(self, filtros: Dict[str, Any] = None,
+                            data_atual: Optional[datetime] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Analisa gaps de IPCA/IGPM gerando os resultados à medida que cada CCO é processada
+        
+        Permite gravar/transmitir o relatório sem manter todas as CCOs em memória.
+        
+        Args:
+            filtros: Filtros opcionais (contrato, campo, período, etc.)
+            data_atual: Data de referência da análise (padrão: agora, UTC)
+            
+        Yields:
+            ('ccos_com_gaps' | 'ccos_com_correcoes_fora_periodo' | 'ccos_com_duplicatas', item da CCO)
+            e, ao final, ('estatisticas', estatísticas consolidadas)
+        """
+        #Ordenação (atendida pelo índice INDICE_CCO_ANALISE, criado por criar_indices_mongodb.py)
+        sort = [('contratoCpp', 1),  ('campo', 1),('dataReconhecimento', 1)]
+        
+        # Query base: CCOs ativas (não totalmente recuperadas)
+        # '$or': [
+        #     {'flgRecuperado': False},
+        #     {'flgRecuperado': {'$exists': False}}
+        # ]
+        # Aplicar filtros específicos (apenas os preenchidos)
+        query = {}
+        if filtros:
+            query = {campo: filtros[campo] for campo in CAMPOS_FILTRO_ANALISE if filtros.get(campo)}
+        
+        # Executar análise
+        if data_atual is None:
             data_atual = datetime.now(timezone.utc)
-            estatisticas = {
-                'total_ccos_analisadas': 0,
-                'ccos_com_gaps': 0,
-                'total_gaps_identificados': 0,
-                'ccos_com_correcoes_fora_periodo': 0,
-                'total_correcoes_fora_periodo': 0,
-                'gaps_por_ano': {},
-                'gaps_por_contrato': {},
-                'correcoes_fora_por_contrato': {},
-                'valor_total_impactado': 0.0
-            }
+        
+        # Taxas históricas de todo o período em memória antes de percorrer as CCOs
+        self._precarregar_taxas(data_atual.year + 1)
+        estatisticas = {
+            'total_ccos_analisadas': 0,
+            'ccos_com_gaps': 0,
+            'total_gaps_identificados': 0,
+            'ccos_com_correcoes_fora_periodo': 0,
+            'total_correcoes_fora_periodo': 0,
+            'gaps_por_ano': {},
+            'gaps_por_contrato': {},
+            'correcoes_fora_por_contrato': {},
+            'valor_total_impactado': 0.0
+        }
+        ccos_com_duplicatas = 0
+        total_duplicatas = 0
+        # Contadores locais (evita reindexar estatisticas a cada gap), gravados ao final
+        gaps_por_ano = Counter()
+        gaps_por_contrato = Counter()
+        correcoes_fora_por_contrato = Counter()
+        
+        colecao = self.db_prd.conta_custo_oleo_entity
+        if self.LEITURA_CCOS_RAW_BATCHES:
+            # Lotes BSON brutos, decodificados de uma vez por lote
+            cursor = colecao.find_raw_batches(query, PROJECAO_CCO_ANALISE)
+        else:
+            cursor = colecao.find(query, PROJECAO_CCO_ANALISE)
+        cursor = cursor.sort(sort).batch_size(self.CURSOR_BATCH_SIZE)
+        if self.CURSOR_MAX_TIME_MS:
+            cursor = cursor.max_time_ms(self.CURSOR_MAX_TIME_MS)
+        ccos = _decodificar_lotes_bson(cursor, colecao.codec_options) if self.LEITURA_CCOS_RAW_BATCHES else cursor
+        if self.LEITURA_CCOS_EM_SEGUNDO_PLANO:
+            ccos = _iterar_em_segundo_plano(ccos, self.CURSOR_BATCH_SIZE)
+        
+        for cco in ccos:
+            estatisticas['total_ccos_analisadas'] += 1
             
-            ccos_com_gaps = []
-            ccos_com_correcoes_fora = []
-            ccos_com_duplicatas = []
+            gaps, correcoes_fora, duplicatas = self._analisar_cco_individual(cco, data_atual)
             
-            cursor = self.db_prd.conta_custo_oleo_entity.find(query).sort(sort)
+            contrato = cco.get('contratoCpp', 'N/A')
+            valor_atual = self._obter_valor_atual_cco(cco)
             
-            for cco in cursor:
-                estatisticas['total_ccos_analisadas'] += 1
+            # Processar gaps
+            if gaps:
+                estatisticas['ccos_com_gaps'] += 1
+                estatisticas['total_gaps_identificados'] += len(gaps)
+                estatisticas['valor_total_impactado'] += valor_atual
                 
-                gaps, correcoes_fora, duplicatas = self._analisar_cco_individual(cco, data_atual)
+                gaps_por_contrato[contrato] += len(gaps)
+                gaps_por_ano.update(gap['ano'] for gap in gaps)
                 
-                contrato = cco.get('contratoCpp', 'N/A')
-                valor_atual = self._obter_valor_atual_cco(cco)
+                # CCO com gaps
+                yield 'ccos_com_gaps', {
+                    '_id': str(cco['_id']),
+                    'contratoCpp': cco.get('contratoCpp'),
+                    'campo': cco.get('campo'),
+                    'remessa': cco.get('remessa'),
+                    'remessaExposicao': cco.get('remessaExposicao'),
+                    'faseRemessa': cco.get('faseRemessa'),
+                    'dataReconhecimento': cco.get('dataReconhecimento'),
+                    'valorAtual': valor_atual,
+                    'gaps': gaps,
+                    'totalGaps': len(gaps)
+                }
+            
+            # Processar correções fora do período
+            if correcoes_fora:
+                estatisticas['ccos_com_correcoes_fora_periodo'] += 1
+                estatisticas['total_correcoes_fora_periodo'] += len(correcoes_fora)
                 
-                # Processar gaps
-                if gaps:
-                    estatisticas['ccos_com_gaps'] += 1
-                    estatisticas['total_gaps_identificados'] += len(gaps)
-                    estatisticas['valor_total_impactado'] += valor_atual
-                    
-                    if contrato not in estatisticas['gaps_por_contrato']:
-                        estatisticas['gaps_por_contrato'][contrato] = 0
-                    estatisticas['gaps_por_contrato'][contrato] += len(gaps)
-                    
-                    for gap in gaps:
-                        ano = gap['ano']
-                        if ano not in estatisticas['gaps_por_ano']:
-                            estatisticas['gaps_por_ano'][ano] = 0
-                        estatisticas['gaps_por_ano'][ano] += 1
-                    
-                    # Adicionar à lista de CCOs com gaps
-                    ccos_com_gaps.append({
-                        '_id': str(cco['_id']),
-                        'contratoCpp': cco.get('contratoCpp'),
-                        'campo': cco.get('campo'),
-                        'remessa': cco.get('remessa'),
-                        'remessaExposicao': cco.get('remessaExposicao'),
-                        'faseRemessa': cco.get('faseRemessa'),
-                        'dataReconhecimento': cco.get('dataReconhecimento'),
-                        'valorAtual': valor_atual,
-                        'gaps': gaps,
-                        'totalGaps': len(gaps)
-                    })
+                correcoes_fora_por_contrato[contrato] += len(correcoes_fora)
                 
-                # Processar correções fora do período
-                if correcoes_fora:
-                    estatisticas['ccos_com_correcoes_fora_periodo'] += 1
-                    estatisticas['total_correcoes_fora_periodo'] += len(correcoes_fora)
-                    
-                    if contrato not in estatisticas['correcoes_fora_por_contrato']:
-                        estatisticas['correcoes_fora_por_contrato'][contrato] = 0
-                    estatisticas['correcoes_fora_por_contrato'][contrato] += len(correcoes_fora)
-                    
-                    # Adicionar à lista de CCOs com correções fora do período
-                    ccos_com_correcoes_fora.append({
-                        '_id': str(cco['_id']),
-                        'contratoCpp': cco.get('contratoCpp'),
-                        'campo': cco.get('campo'),
-                        'remessa': cco.get('remessa'),
-                        'remessaExposicao': cco.get('remessaExposicao'),
-                        'faseRemessa': cco.get('faseRemessa'),
-                        'dataReconhecimento': cco.get('dataReconhecimento'),
-                        'valorAtual': valor_atual,
-                        'correcoes_fora_periodo': correcoes_fora,
-                        'totalCorrecoesFora': len(correcoes_fora)
-                    })
-                    
-                if duplicatas:
-                    ccos_com_duplicatas.append({
-                        '_id': str(cco['_id']),
-                        'contratoCpp': cco.get('contratoCpp'),
-                        'duplicatas': duplicatas,
-                        'totalDuplicatas': len(duplicatas)
-                    })
-            estatisticas['ccos_com_duplicatas'] = len(ccos_com_duplicatas)
-            estatisticas['total_duplicatas'] = sum(len(cco['duplicatas']) for cco in ccos_com_duplicatas)
+                # CCO com correções fora do período
+                yield 'ccos_com_correcoes_fora_periodo', {
+                    '_id': str(cco['_id']),
+                    'contratoCpp': cco.get('contratoCpp'),
+                    'campo': cco.get('campo'),
+                    'remessa': cco.get('remessa'),
+                    'remessaExposicao': cco.get('remessaExposicao'),
+                    'faseRemessa': cco.get('faseRemessa'),
+                    'dataReconhecimento': cco.get('dataReconhecimento'),
+                    'valorAtual': valor_atual,
+                    'correcoes_fora_periodo': correcoes_fora,
+                    'totalCorrecoesFora': len(correcoes_fora)
+                }
                 
-            
-            return {
-                'data_analise': data_atual.isoformat(),
-                'filtros_aplicados': filtros or {},
-                'estatisticas': estatisticas,
-                'ccos_com_gaps': ccos_com_gaps,
-                'ccos_com_correcoes_fora_periodo': ccos_com_correcoes_fora,
-                'ccos_com_duplicatas': ccos_com_duplicatas
-            }
-            
-        except Exception as e:
-            logger.error(f"Erro ao analisar gaps do sistema: {e}")
-            return {'error': str(e)}
+            if duplicatas:
+                ccos_com_duplicatas += 1
+                total_duplicatas += len(duplicatas)
+                yield 'ccos_com_duplicatas', {
+                    '_id': str(cco['_id']),
+                    'contratoCpp': cco.get('contratoCpp'),
+                    'duplicatas': duplicatas,
+                    'totalDuplicatas': len(duplicatas)
+                }
+        estatisticas['gaps_por_ano'] = dict(gaps_por_ano)
+        estatisticas['gaps_por_contrato'] = dict(gaps_por_contrato)
+        estatisticas['correcoes_fora_por_contrato'] = dict(correcoes_fora_por_contrato)
+        estatisticas['ccos_com_duplicatas'] = ccos_com_duplicatas
+        estatisticas['total_duplicatas'] = total_duplicatas
+        
+        yield 'estatisticas', estatisticas
     
     
-    def _analisar_cco_individual(self, cco: Dict[str, Any], data_atual: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def _analisar_cco_individual(self, cco: Dict[str, Any], data_atual: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Analisa uma CCO individual para identificar gaps e correções fora do período
         
@@ -210,6 +638,20 @@ class IPCAGapAnalyzer:
         - Verifica se houve alterações (recuperação/retificação) entre a data devida e aplicada
         - Reporta essas situações com detalhes das alterações encontradas
         """
+        # A CCO não é alterada durante a análise: o índice de correções é montado uma vez
+        # e reaproveitado pelas consultas desta CCO, sendo descartado ao final
+        self._cco_em_analise = cco
+        self._indice_em_analise = None
+        try:
+            return self._analisar_cco(cco, data_atual)
+        finally:
+            self._cco_em_analise = None
+            self._indice_em_analise = None
+    
+    def _analisar_cco(self, cco: Dict[str, Any], data_atual: datetime) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Corpo da análise de uma CCO (ver _analisar_cco_individual)
+        """
         gaps = []
         correcoes_fora_do_periodo = []
         
@@ -220,13 +662,7 @@ class IPCAGapAnalyzer:
         # Validar data de reconhecimento
         data_reconhecimento = self._extrair_data_reconhecimento(cco)
         if not data_reconhecimento:
-            return gaps, correcoes_fora_do_periodo
-        
-        # Mapear correções IPCA/IGPM existentes
-        correcoes_existentes = self._mapear_correcoes_ipca_igpm(cco)
-        
-        # NOVA FUNCIONALIDADE: Mapear TODAS as correções por data para análise temporal
-        todas_correcoes_cronologicas = self._mapear_todas_correcoes_cronologicas(cco)
+            return gaps, correcoes_fora_do_periodo, self._identificar_correcoes_duplicadas(cco)
         
         # Calcular primeiro aniversário: 1 mês após o reconhecimento
         mes_reconhecimento = data_reconhecimento.month
@@ -240,23 +676,43 @@ class IPCAGapAnalyzer:
             mes_aniversario = mes_reconhecimento + 1
             ano_aniversario = ano_reconhecimento + 1
         
-        logger.info(f"Analisando CCO {cco['_id']} - Reconhecimento: {mes_reconhecimento:02d}/{ano_reconhecimento}, Primeiro aniversário: {mes_aniversario:02d}/{ano_aniversario}")
-        
-        # Mapear correções por ano para melhor análise
-        correcoes_por_ano = self._mapear_correcoes_por_ano(cco)
-        
-        while ano_aniversario <= data_atual.year:
+        logger.info(
+            "Analisando CCO %s - Reconhecimento: %02d/%d, Primeiro aniversário: %02d/%d",
+            cco['_id'], mes_reconhecimento, ano_reconhecimento, mes_aniversario, ano_aniversario
+        )
+        
+        # Último aniversário devido: o do ano atual só conta a partir do dia 16 do mês
+        ano_fim = data_atual.year
+        if ano_aniversario <= ano_fim:
+            if mes_aniversario > data_atual.month:
+                logger.debug("CCO %s - Aniversário %02d/%d é futuro", cco['_id'], mes_aniversario, ano_fim)
+                ano_fim -= 1
+            elif mes_aniversario == data_atual.month and data_atual.day < 16:
+                logger.debug("CCO %s - Aniversário %02d/%d ainda não atingiu prazo limite", cco['_id'], mes_aniversario, ano_fim)
+                ano_fim -= 1
+        
+        # Nenhum aniversário vencido: não há gaps nem correções fora do prazo a verificar
+        if ano_aniversario > ano_fim:
+            return gaps, correcoes_fora_do_periodo, self._identificar_correcoes_duplicadas(cco)
+        
+        # Índice único das correções IPCA/IGPM: por período (ano, mês) e por ano
+        indice = self._index_correcoes(cco)
+        correcoes_existentes = indice.mapeadas
+        correcoes_por_ano = indice.por_ano
+        
+        # NOVA FUNCIONALIDADE: TODAS as correções por data para análise temporal
+        # (montado só na primeira correção fora do prazo)
+        todas_correcoes_cronologicas = None
+        
+        # Mês da taxa e deslocamento do ano são iguais em todos os aniversários da CCO: calcula uma vez
+        ano_taxa_inicio, mes_taxa = self._calcular_mes_taxa_aplicacao(ano_aniversario, mes_aniversario)
+        deslocamento_ano_taxa = ano_taxa_inicio - ano_aniversario
+        anos_aniversario = range(ano_aniversario, ano_fim + 1)
+        periodos_taxa = [(ano + deslocamento_ano_taxa, mes_taxa) for ano in anos_aniversario]
+        
+        for ano_aniversario in anos_aniversario:
+            ano_taxa = ano_aniversario + deslocamento_ano_taxa
             chave_periodo = (ano_aniversario, mes_aniversario)
-            ano_taxa, mes_taxa = self._calcular_mes_taxa_aplicacao(ano_aniversario, mes_aniversario)
-            
-            # Verificar data limite
-            if ano_aniversario == data_atual.year and mes_aniversario >= data_atual.month:
-                if mes_aniversario == data_atual.month and data_atual.day < 16:
-                    logger.info(f"CCO {cco['_id']} - Aniversário {mes_aniversario:02d}/{ano_aniversario} ainda não atingiu prazo limite")
-                    break
-                elif mes_aniversario > data_atual.month:
-                    logger.info(f"CCO {cco['_id']} - Aniversário {mes_aniversario:02d}/{ano_aniversario} é futuro")
-                    break
             
             # Data limite para aplicação da correção (dia 15 do mês seguinte ao aniversário)
             data_limite_aplicacao = self._calcular_data_limite_aplicacao(ano_aniversario, mes_aniversario)
@@ -276,26 +732,26 @@ class IPCAGapAnalyzer:
                 valor_base = self._obter_valor_base_para_gap(cco, ano_aniversario, mes_aniversario)
                 # regra para ignorar gaps com valor base 0, pois não são relevantes para o processo de correção de IPCA/IGPM de valores menor ou iguais a zero
                 if valor_base <= 0 and IGNORAR_CORECAO_MONETARIA_VALOR_NEGATIVO:
-                    logger.info(f"CCO {cco['_id']} - GAP ignorado: {mes_aniversario:02d}/{ano_aniversario} - Valor base: {valor_base}")
-                    print(f"_analisar_cco_individual: VERIFIQUE: CCO {cco['_id']} - GAP ignorado: {mes_aniversario:02d}/{ano_aniversario} - Valor base: {valor_base}")
+                    logger.debug("CCO %s - GAP ignorado: %02d/%d - Valor base: %s", cco['_id'], mes_aniversario, ano_aniversario, valor_base)
                     # Próximo aniversário
-                    ano_aniversario += 1
                     continue
                 
                 gap_info = {
                     'ano': ano_aniversario,
                     'mes': mes_aniversario,
-                    'data_aniversario': f"{mes_aniversario:02d}/{ano_aniversario}",
+                    'data_aniversario': _mes_ano_str(ano_aniversario, mes_aniversario),
                     'ano_taxa': ano_taxa,
                     'mes_taxa': mes_taxa,
-                    'periodo_taxa': f"{mes_taxa:02d}/{ano_taxa}",
+                    'periodo_taxa': _mes_ano_str(ano_taxa, mes_taxa),
                     'valor_base': valor_base,
                     'data_limite': data_limite_aplicacao.strftime('%d/%m/%Y'),
-                    'prioridade': self._calcular_prioridade_gap(datetime(ano_aniversario, mes_aniversario, 16, tzinfo=timezone.utc), data_atual)
+                    'prioridade': self._calcular_prioridade_gap(
+                        _data_utc(ano_aniversario, mes_aniversario, 16), valor_base, now=data_atual
+                    )
                 }
                 
                 gaps.append(gap_info)
-                logger.info(f"CCO {cco['_id']} - GAP identificado: {gap_info['data_aniversario']}")
+                logger.debug("CCO %s - GAP identificado: %s", cco['_id'], gap_info['data_aniversario'])
                 
             else:
                 # Cenário 2: Correção existe - verificar se foi aplicada no prazo
@@ -303,9 +759,11 @@ class IPCAGapAnalyzer:
                 
                 if data_aplicacao > data_limite_aplicacao:
                     # Correção aplicada fora do prazo
-                    logger.info(f"CCO {cco['_id']} - Correção fora do prazo: {mes_aniversario:02d}/{ano_aniversario}")
+                    logger.debug("CCO %s - Correção fora do prazo: %02d/%d", cco['_id'], mes_aniversario, ano_aniversario)
                     
                     # NOVO CENÁRIO: Verificar alterações entre data devida e data aplicada
+                    if todas_correcoes_cronologicas is None:
+                        todas_correcoes_cronologicas = self._mapear_todas_correcoes_cronologicas(cco)
                     alteracoes_no_periodo = self._identificar_alteracoes_entre_datas(
                         todas_correcoes_cronologicas,
                         data_limite_aplicacao,
@@ -314,6 +772,9 @@ class IPCAGapAnalyzer:
                     )
                     
                     # Obter informações da taxa esperada vs aplicada
+                    # (na primeira taxa ausente do cache, carrega de uma vez as taxas de todos os aniversários da CCO)
+                    if (ano_taxa, mes_taxa, correcao_encontrada['tipo']) not in self._taxa_cache:
+                        self._prefetch_taxas(periodos_taxa, correcao_encontrada['tipo'])
                     taxa_esperada = self._obter_taxa_historica(ano_taxa, mes_taxa, correcao_encontrada['tipo'])
                     if taxa_esperada is None:
                         logger.error(f"CCO {cco['_id']} - Correção fora do prazo inconsistente (não foi possivel recuperar informações da taxa): {mes_aniversario:02d}/{ano_aniversario}")
@@ -321,7 +782,7 @@ class IPCAGapAnalyzer:
                     taxa_aplicada = correcao_encontrada.get('taxa_correcao', 1.0)
                     
                     if alteracoes_no_periodo:
-                        logger.info(f"CCO {cco['_id']} - Correção fora do prazo com alterações: {mes_aniversario:02d}/{ano_aniversario}")
+                        logger.debug("CCO %s - Correção fora do prazo com alterações: %02d/%d", cco['_id'], mes_aniversario, ano_aniversario)
 
                         # Calcular valor base considerando alterações no período
                         valor_base_original, valor_antes, valor_depois = self._obter_valor_base_original_para_correcao(
@@ -366,9 +827,6 @@ class IPCAGapAnalyzer:
                         for alteracao in alteracoes_no_periodo:
                             logger.warning(f"  - {alteracao['tipo']} em {alteracao['data_aplicacao']} (valor: R$ {alteracao['valor_impacto']:,.2f})")
             
-            # Próximo aniversário
-            ano_aniversario += 1
-            
         duplicatas = self._identificar_correcoes_duplicadas(cco)
         
         return gaps, correcoes_fora_do_periodo, duplicatas
@@ -386,29 +844,17 @@ class IPCAGapAnalyzer:
             Valor base para o gap (valor da última correção anterior ao aniversário)
         """
         # Data limite de referência: dia 15 do mês/ano do aniversário ********************
-        data_limite_aniversario = datetime(ano_aniversario, mes_aniversario, 15, tzinfo=timezone.utc)
+        data_limite_aniversario = _data_utc(ano_aniversario, mes_aniversario, 15)
         
-        correcoes_anteriores = []
-        correcoes = cco.get('correcoesMonetarias', [])
+        # Correção mais recente anterior ao aniversário, por busca binária na lista cronológica
+        # do índice (em empate de data prevalece a primeira da lista)
+        datadas = self._index_correcoes(cco).datadas
+        posicao = bisect_left(datadas, data_limite_aniversario, key=_DATA_DO_PAR)
         
-        # Iterar sobre todas as correções monetárias
-        for correcao in correcoes:
-            data_correcao = self._extrair_data_correcao(correcao)
-            
-            if data_correcao and data_correcao < data_limite_aniversario:
-                correcoes_anteriores.append({
-                    'data': data_correcao,
-                    'correcao': correcao
-                })
-        
-        # Se existem correções anteriores, pegar a mais recente
-        if correcoes_anteriores:
-            # Ordenar por data e pegar a mais recente
-            ultima_correcao_anterior = max(correcoes_anteriores, key=lambda x: x['data'])
-            valor_base = self._converter_decimal128_para_float(
-                ultima_correcao_anterior['correcao'].get('valorReconhecidoComOH', 0)
-            )
-            return valor_base
+        # Se existem correções anteriores, usar a mais recente
+        if posicao:
+            primeira_da_data = bisect_left(datadas, datadas[posicao - 1][0], 0, posicao, key=_DATA_DO_PAR)
+            return _para_float(datadas[primeira_da_data][1].get('valorReconhecidoComOH', 0))
         
         # Se não há correções anteriores, usar valor original da CCO
         valor_original = self._obter_valor_raiz_cco(cco)
@@ -433,7 +879,7 @@ class IPCAGapAnalyzer:
         """
         
         # Data limite: dia 15 do mês de aniversário, final do dia # TODO Revisar se a data limite deve ser essa
-        data_limite = datetime(ano_aniversario, mes_aniversario, 19, 23, 59, 59, tzinfo=timezone.utc)
+        data_limite = _data_utc(ano_aniversario, mes_aniversario, 19, 23, 59, 59)
         
         return data_limite
     
@@ -441,28 +887,7 @@ class IPCAGapAnalyzer:
         """
         Mapeia correções IPCA/IGPM por ano
         """
-        correcoes_por_ano = {}
-        correcoes = cco.get('correcoesMonetarias', [])
-        
-        for correcao in correcoes:
-            if correcao.get('tipo') in ['IPCA', 'IGPM']:
-                data_correcao = self._extrair_data_correcao(correcao)
-                if data_correcao:
-                    ano = data_correcao.year
-                    if ano not in correcoes_por_ano:
-                        correcoes_por_ano[ano] = []
-                    correcoes_por_ano[ano].append({
-                        'correcao': correcao,
-                        'tipo': correcao.get('tipo'),
-                        'data_correcao': data_correcao,
-                        'data_aplicacao': data_correcao,
-                        'mes': data_correcao.month,
-                        'taxa_correcao': self._converter_decimal128_para_float(
-                            correcao.get('taxaCorrecao', 1.0)
-                        ),
-                    })
-        
-        return correcoes_por_ano
+        return self._index_correcoes(cco).por_ano
 
     def _buscar_correcao_para_aniversario(self, cco: Dict[str, Any], ano_aniversario: int, 
                                         mes_aniversario: int, correcoes_por_ano: Dict) -> Optional[Dict]:
@@ -470,26 +895,33 @@ class IPCAGapAnalyzer:
         Busca correção que pode estar relacionada a um aniversário específico
         Considera correções no ano do aniversário e no ano seguinte
         """
-        data_aniversario = datetime(ano_aniversario, mes_aniversario, 15, tzinfo=timezone.utc)
+        data_aniversario = _data_utc(ano_aniversario, mes_aniversario, 15)
+        ts_aniversario = data_aniversario.timestamp()
+        
+        # Listas ordenadas por data no índice (correcoes_por_ano vem do mesmo índice)
+        ts_por_ano = self._index_correcoes(cco).ts_por_ano
         
         # Buscar em anos próximos (ano do aniversário e seguinte)
         for ano_busca in [ano_aniversario, ano_aniversario + 1]:
             if ano_busca in correcoes_por_ano:
                 correcoes_ano = correcoes_por_ano[ano_busca]
                 
-                # Encontrar correção mais próxima APÓS o aniversário
-                for correcao_info in correcoes_ano:
-                    data_correcao = correcao_info['data_correcao']
-                    
-                    # Se a correção é posterior ao aniversário (máximo 18 meses de atraso)
-                    if data_correcao > data_aniversario:
-                        diff_meses = (data_correcao.year - data_aniversario.year) * 12 + (data_correcao.month - data_aniversario.month)
-                        
-                        # Considerar apenas correções com até 11 meses de atraso # TODO parametrizar
-                        if diff_meses < 12:
-                            return correcao_info
-                        else:
-                            logger.warning(f"Correção com mais de 11 meses de atraso (ano: {data_correcao.year}, mes: {data_correcao.month}). Ignorando.")
+                # Primeira correção estritamente APÓS o aniversário
+                posicao = bisect_right(ts_por_ano[ano_busca], ts_aniversario)
+                if posicao == len(correcoes_ano):
+                    continue
+                
+                correcao_info = correcoes_ano[posicao]
+                data_correcao = correcao_info['data_correcao']
+                diff_meses = (data_correcao.year - data_aniversario.year) * 12 + (data_correcao.month - data_aniversario.month)
+                
+                # Considerar apenas correções com até 11 meses de atraso # TODO parametrizar
+                if diff_meses < 12:
+                    return correcao_info
+                
+                # As demais são ainda mais tardias
+                logger.warning(f"Correção com mais de 11 meses de atraso (ano: {data_correcao.year}, mes: {data_correcao.month}). Ignorando.")
+                return None
         
         return None
     
@@ -498,26 +930,15 @@ class IPCAGapAnalyzer:
         Obtém taxa histórica das coleções ipca_entity ou igpm_entity
         """
         try:
-            if tipo == 'IPCA':
-                colecao = self.db.ipca_entity
-            elif tipo == 'IGPM':
-                colecao = self.db.igpm_entity
-            else:
+            tipo_indice = tipo
+            if tipo not in ('IPCA', 'IGPM'):
                 logger.warning(f"Tipo de índice não reconhecido: {tipo}. Usando IPCA.")
-                colecao = self.db.ipca_entity
+                tipo_indice = 'IPCA'
             
-            # Buscar taxa na coleção
-            documento = colecao.find_one({
-                'anoReferencia': ano,
-                'mesReferencia': mes
-            })
+            taxa_fator = self._consultar_taxa_fator(ano, mes, tipo_indice)
             
-            if documento:
-                valor_percentual = self._converter_decimal128_para_float(documento['valor'])
-                # Converter de percentual para fator (ex: 4.47% -> 1.0447)
-                taxa_fator = 1 + (valor_percentual / 100)
-                
-                logger.info(f"Taxa {tipo} encontrada para {mes:02d}/{ano}: {valor_percentual}% (fator: {taxa_fator})")
+            if taxa_fator is not None:
+                logger.debug("Taxa %s encontrada para %02d/%d: fator %s", tipo, mes, ano, taxa_fator)
                 return taxa_fator
             else:
                 logger.error(f"Taxa {tipo} não encontrada para {mes:02d}/{ano}. Usando taxa padrão.")
@@ -527,157 +948,272 @@ class IPCAGapAnalyzer:
             logger.error(f"Erro ao buscar taxa {tipo} para {mes:02d}/{ano}: {e}")
             return None  # 4% como fallback
 
-    def _calcular_atraso_meses(self, data_esperada: datetime, data_real: datetime) -> int:
-        """
-        Calcula atraso em meses entre duas datas
+    def _precarregar_taxas(self, ano_fim: int) -> None:
         """
-        return (data_real.year - data_esperada.year) * 12 + (data_real.month - data_esperada.month)
+        Carrega no cache todas as taxas IPCA/IGPM até ano_fim (uma consulta por índice)
         
-    def _extrair_data_reconhecimento(self, cco: Dict[str, Any]) -> Optional[datetime]:
-        """
-        Extrai data de reconhecimento da CCO de forma segura
+        Meses sem taxa entre o primeiro ano encontrado e ano_fim ficam registrados como None,
+        de modo que a análise não volte ao banco para eles.
         """
-        data_reconhecimento = cco.get('dataReconhecimento')
-        if not data_reconhecimento:
-            return None
-        
-        try:
-            if isinstance(data_reconhecimento, str):
-                # Tratar formato específico: '2025-07-28T17:28:13-0300'
-                data_str = data_reconhecimento
+        for tipo, colecao in (('IPCA', self.db.ipca_entity), ('IGPM', self.db.igpm_entity)):
+            try:
+                cursor = colecao.find(
+                    {'anoReferencia': {'$lte': ano_fim}},
+                    {'anoReferencia': 1, 'mesReferencia': 1, 'valor': 1, '_id': 0}
+                ).batch_size(TAMANHO_LOTE_TAXAS)
+                
+                encontrados = _fatores_por_periodo(cursor)
                 
-                # Se tem timezone no formato -HHMM ou +HHMM, adicionar dois pontos
-                import re
-                if re.search(r'[+-]\d{4}$', data_str):
-                    # Converter -0300 para -03:00
-                    data_str = data_str[:-2] + ':' + data_str[-2:]
+                if not encontrados:
+                    continue
                 
-                # Converter para datetime com timezone
-                dt = datetime.fromisoformat(data_str)
+                for ano in range(min(ano for ano, _ in encontrados), ano_fim + 1):
+                    for mes in range(1, 13):
+                        self._registrar_taxa((ano, mes, tipo), encontrados.get((ano, mes)))
                 
-                # Se não tem timezone, assumir UTC
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt
+                logger.info(f"Taxas {tipo} pré-carregadas: {len(encontrados)} períodos")
                 
-            elif isinstance(data_reconhecimento, datetime):
-                # Se não tem timezone, assumir UTC
-                if data_reconhecimento.tzinfo is None:
-                    return data_reconhecimento.replace(tzinfo=timezone.utc)
-                return data_reconhecimento
+            except Exception as e:
+                # Sem pré-carga, as taxas continuam sendo carregadas por CCO
+                logger.error(f"Erro ao pré-carregar taxas {tipo}: {e}")
+    
+    def _prefetch_taxas(self, periodos: Iterable[Tuple[int, int]], tipo: str = 'IPCA') -> None:
+        """
+        Carrega no cache, em uma única consulta, as taxas dos períodos (ano, mes) informados
+        
+        Períodos sem taxa na coleção ficam registrados como None.
+        """
+        if tipo not in ('IPCA', 'IGPM'):
+            return
+        
+        pendentes = {(ano, mes) for ano, mes in periodos if (ano, mes, tipo) not in self._taxa_cache}
+        if not pendentes:
+            return
+        
+        try:
+            colecao = self.db.ipca_entity if tipo == 'IPCA' else self.db.igpm_entity
+            cursor = colecao.find(
+                {'$or': [{'anoReferencia': ano, 'mesReferencia': mes} for ano, mes in pendentes]},
+                {'anoReferencia': 1, 'mesReferencia': 1, 'valor': 1, '_id': 0}
+            ).batch_size(max(101, min(len(pendentes), TAMANHO_LOTE_TAXAS)))
+            
+            encontrados = _fatores_por_periodo(cursor)
+            
+            for ano, mes in pendentes:
+                self._registrar_taxa((ano, mes, tipo), encontrados.get((ano, mes)))
                 
         except Exception as e:
-            logger.warning(f"Erro ao processar data de reconhecimento: {e}")
-            # Fallback: tentar parsing manual
-            try:
-                if isinstance(data_reconhecimento, str):
-                    # Remover timezone e assumir UTC
-                    data_limpa = re.sub(r'[+-]\d{4}$', '', data_reconhecimento)
-                    dt = datetime.fromisoformat(data_limpa)
-                    return dt.replace(tzinfo=timezone.utc)
-            except:
-                pass
-            return None
+            # Sem prefetch, as taxas continuam sendo consultadas individualmente
+            logger.error(f"Erro ao carregar taxas {tipo} em lote: {e}")
+    
+    def _consultar_taxa_fator(self, ano: int, mes: int, tipo: str) -> Optional[float]:
+        """
+        Consulta a taxa (IPCA/IGPM) do período e retorna o fator (ex: 4.47% -> 1.0447)
         
-        return None
+        O resultado, inclusive ausência de taxa (None), fica em cache por (ano, mes, tipo)
+        durante a vida do analisador. Erros de acesso ao banco são propagados.
+        """
+        chave = (ano, mes, tipo)
+        if chave in self._taxa_cache:
+            return self._taxa_cache[chave]
+        
+        colecao = self.db.ipca_entity if tipo == 'IPCA' else self.db.igpm_entity
+        documento = colecao.find_one(
+            {'anoReferencia': ano, 'mesReferencia': mes},
+            {'valor': 1, '_id': 0}
+        )
+        
+        taxa_fator = None
+        if documento:
+            valor_percentual = _para_float(documento['valor'])
+            # Converter de percentual para fator (ex: 4.47% -> 1.0447)
+            taxa_fator = 1 + (valor_percentual / 100)
+        
+        self._registrar_taxa(chave, taxa_fator)
+        return taxa_fator
     
-    def _mapear_correcoes_ipca_igpm(self, cco: Dict[str, Any]) -> Dict[tuple, Dict[str, Any]]:
+    def _registrar_taxa(self, chave: Tuple[int, int, str], taxa_fator: Optional[float]) -> None:
         """
-        Mapeia todas as correções IPCA/IGPM existentes na CCO
+        Guarda a taxa no cache da instância e, se encontrada, no cache do processo
+        """
+        self._taxa_cache[chave] = taxa_fator
+        if taxa_fator is not None:
+            self._taxas_publicadas[chave] = taxa_fator
+
+    def _extrair_data_reconhecimento(self, cco: Dict[str, Any]) -> Optional[datetime]:
+        """
+        Extrai data de reconhecimento da CCO de forma segura
+        
+        Strings ISO passam pelo conversor memoizado do módulo (nada é gravado na CCO).
+        """
+        data_reconhecimento = cco.get('dataReconhecimento')
+        
+        # Caminho rápido: datas já decodificadas pelo BSON como datetime
+        if data_reconhecimento.__class__ is datetime:
+            return data_reconhecimento if data_reconhecimento.tzinfo is not None else data_reconhecimento.replace(tzinfo=timezone.utc)
+        
+        return self._converter_data(data_reconhecimento)
+    
+    def _index_correcoes(self, cco: Dict[str, Any]) -> _IndiceCorrecoesCCO:
+        """
+        Indexa as correções IPCA/IGPM da CCO para consulta direta
+
+        Durante _analisar_cco_individual o índice da CCO em análise é montado uma única vez;
+        nas demais chamadas (ex: motor de correção, que altera as correções) é sempre remontado.
+        Nada é guardado no próprio documento.
+        """
+        if cco is self._cco_em_analise:
+            if self._indice_em_analise is None:
+                self._indice_em_analise = self._montar_indice_correcoes(cco)
+            return self._indice_em_analise
+        return self._montar_indice_correcoes(cco)
+
+    def _montar_indice_correcoes(self, cco: Dict[str, Any]) -> _IndiceCorrecoesCCO:
+        """
+        Monta o índice das correções IPCA/IGPM da CCO (ver _index_correcoes)
         """
-        correcoes_mapeadas = {}  # Mudar de set() para {}
         correcoes = cco.get('correcoesMonetarias', [])
 
-        for correcao in correcoes:
-            tipo = correcao.get('tipo', '')
-            if tipo in ['IPCA', 'IGPM']:
-                data_correcao = self._extrair_data_correcao(correcao)
-                if data_correcao:
-                    chave = (data_correcao.year, data_correcao.month)
-                    correcoes_mapeadas[chave] = {  # Adicionar esta estrutura
-                        'tipo': tipo,
-                        'data_aplicacao': data_correcao,
-                        'taxa_correcao': self._converter_decimal128_para_float(
-                            correcao.get('taxaCorrecao', 1.0)
-                        ),
-                        'correcao_original': correcao
-                    }
+        por_tipo = {'IPCA': {}, 'IGPM': {}}
+        todas_por_ano = {}
+        por_ano = {}
+        mapeadas = {}
+        por_periodo = {}
+        # Todas as correções com a data já convertida (uma conversão por correção)
+        datadas = []
+        # Correções IPCA/IGPM repetidas no período, posteriores à primeira (ordem da lista)
+        duplicadas = []
+        # Listas normalmente já vêm em ordem de data: nesse caso as ordenações são dispensadas
+        em_ordem = True
+        data_anterior = None
+
+        for posicao, correcao in enumerate(correcoes):
+            data_correcao = self._extrair_data_correcao(correcao)
+            if not data_correcao:
+                continue
+            if em_ordem and data_anterior is not None and data_correcao < data_anterior:
+                em_ordem = False
+            data_anterior = data_correcao
+            datadas.append((data_correcao, correcao))
+            
+            tipo = correcao.get('tipo')
+            if tipo in ('IPCA', 'IGPM'):
+                ano, mes = data_correcao.year, data_correcao.month
+                # Mantém a primeira correção do período (ordem da lista)
+                por_tipo[tipo].setdefault((ano, mes), correcao)
+                # Uma única consulta ao período: se a primeira não é esta, é duplicata (se posterior)
+                data_primeira, primeira = por_periodo.setdefault((ano, mes), (data_correcao, correcao))
+                if primeira is not correcao and data_correcao > data_primeira:
+                    duplicadas.append((posicao, data_correcao, correcao))
+                todas_por_ano.setdefault(ano, []).append((data_correcao, correcao))
+                
+                # Estrutura única atende ao mapeamento por ano e por período
+                info = {
+                    'correcao': correcao,
+                    'correcao_original': correcao,
+                    'tipo': tipo,
+                    'data_correcao': data_correcao,
+                    'data_aplicacao': data_correcao,
+                    'mes': mes,
+                    'taxa_correcao': _para_float(correcao.get('taxaCorrecao', 1.0)),
+                }
+                por_ano.setdefault(ano, []).append(info)
+                # No mapeamento por período prevalece a última correção
+                mapeadas[(ano, mes)] = info
+
+        # Ordenação estável: correções de mesma data mantêm a ordem da lista.
+        # Em ordem, a lista cronológica é a própria sequência (e as sublistas já estão ordenadas)
+        sequencia = datadas
+        if not em_ordem:
+            datadas = sorted(sequencia, key=_DATA_DO_PAR)
+
+        # Listas por ano em ordem cronológica, com timestamps paralelos para busca binária
+        ts_por_ano = {}
+        for ano, infos in por_ano.items():
+            if not em_ordem:
+                infos.sort(key=_DATA_DA_CORRECAO)
+            ts_por_ano[ano] = [info['data_correcao'].timestamp() for info in infos]
 
-        return correcoes_mapeadas
+        indice = _IndiceCorrecoesCCO(
+            ipca=por_tipo['IPCA'],
+            igpm=por_tipo['IGPM'],
+            todas_por_ano=todas_por_ano,
+            por_ano=por_ano,
+            ts_por_ano=ts_por_ano,
+            mapeadas=mapeadas,
+            datadas=datadas,
+            sequencia=sequencia,
+            duplicadas=duplicadas,
+        )
+        return indice
+
+    def _mapear_correcoes_ipca_igpm(self, cco: Dict[str, Any]) -> Dict[tuple, Dict[str, Any]]:
+        """
+        Mapeia todas as correções IPCA/IGPM existentes na CCO
+        """
+        return self._index_correcoes(cco).mapeadas
     
     def _identificar_correcoes_duplicadas(self, cco: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Identifica correções IPCA/IGPM duplicadas no mesmo período"""
         duplicatas = []
-        correcoes_ipca_igmp = {}
         
-        for i, correcao in enumerate(cco.get('correcoesMonetarias', [])):
-            if correcao.get('tipo') in ['IPCA', 'IGPM']:
-                data_correcao = self._extrair_data_correcao(correcao)
-                if data_correcao:
-                    chave = (data_correcao.year, data_correcao.month)
-                    
-                    if chave in correcoes_ipca_igmp:
-                        # Duplicata encontrada - manter a mais antiga
-                        correcao_anterior = correcoes_ipca_igmp[chave]
-                        if data_correcao > correcao_anterior['data']:
-                            duplicatas.append({
-                                'contratoCpp': cco.get('contratoCpp'),
-                                'campo': cco.get('campo'),  
-                                'remessa': cco.get('remessa'),
-                                'faseRemessa': cco.get('faseRemessa'),
-                                'dataReconhecimento': cco.get('dataReconhecimento'),
-                                'indice': i,
-                                'periodo': f"{data_correcao.month:02d}/{data_correcao.year}",
-                                'valor_duplicado': self._converter_decimal128_para_float(
-                                    correcao.get('diferencaValor', 0)
-                                ),
-                                'correcao_duplicada': correcao
-                            })
-                    else:
-                        correcoes_ipca_igmp[chave] = {'data': data_correcao, 'indice': i}
+        # Duplicatas (mantida a mais antiga do período) já levantadas na indexação da CCO
+        for i, data_correcao, correcao in self._index_correcoes(cco).duplicadas:
+            duplicatas.append({
+                'contratoCpp': cco.get('contratoCpp'),
+                'campo': cco.get('campo'),  
+                'remessa': cco.get('remessa'),
+                'faseRemessa': cco.get('faseRemessa'),
+                'dataReconhecimento': cco.get('dataReconhecimento'),
+                'indice': i,
+                'periodo': f"{data_correcao.month:02d}/{data_correcao.year}",
+                'valor_duplicado': _para_float(
+                    correcao.get('diferencaValor', 0)
+                ),
+                'correcao_duplicada': correcao
+            })
         
         return duplicatas
     
     def _extrair_data_correcao(self, correcao: Dict[str, Any]) -> Optional[datetime]:
         """
         Extrai data de correção de forma segura
+        
+        Strings ISO passam pelo conversor memoizado do módulo (nada é gravado na correção).
         """
         data_correcao = correcao.get('dataCorrecao') or correcao.get('dataCriacaoCorrecao')
-        if not data_correcao:
+        
+        # Caminho rápido: datas já decodificadas pelo BSON como datetime
+        if data_correcao.__class__ is datetime:
+            return data_correcao if data_correcao.tzinfo is not None else data_correcao.replace(tzinfo=timezone.utc)
+        
+        return self._converter_data(data_correcao)
+    
+    def _converter_data(self, valor) -> Optional[datetime]:
+        """
+        Converte data (string ISO ou datetime) para datetime com timezone, de forma segura
+        """
+        if not valor:
             return None
         
         try:
-            if isinstance(data_correcao, str):
+            if isinstance(valor, str):
                 # Tratar formato específico: '2025-07-28T17:28:13-0300'
-                data_str = data_correcao
-                
-                # Se tem timezone no formato -HHMM ou +HHMM, adicionar dois pontos
-                import re
-                if re.search(r'[+-]\d{4}$', data_str):
-                    # Converter -0300 para -03:00
-                    data_str = data_str[:-2] + ':' + data_str[-2:]
-                
-                # Converter para datetime com timezone
-                dt = datetime.fromisoformat(data_str)
+                return _converter_data_iso_com_tz(valor)
                 
+            elif isinstance(valor, datetime):
                 # Se não tem timezone, assumir UTC
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt
-                
-            elif isinstance(data_correcao, datetime):
-                # Se não tem timezone, assumir UTC
-                if data_correcao.tzinfo is None:
-                    return data_correcao.replace(tzinfo=timezone.utc)
-                return data_correcao
+                if valor.tzinfo is None:
+                    return valor.replace(tzinfo=timezone.utc)
+                return valor
                 
         except Exception as e:
-            logger.warning(f"Erro ao processar data de reconhecimento: {e}")
+            logger.warning(f"Erro ao processar data {valor}: {e}")
             # Fallback: tentar parsing manual
             try:
-                if isinstance(data_correcao, str):
+                if isinstance(valor, str):
                     # Remover timezone e assumir UTC
-                    data_limpa = re.sub(r'[+-]\d{4}$', '', data_correcao)
+                    data_limpa = _TZ_SUFFIX_RE.sub('', valor)
                     dt = datetime.fromisoformat(data_limpa)
                     return dt.replace(tzinfo=timezone.utc)
             except:
@@ -765,47 +1301,46 @@ class IPCAGapAnalyzer:
         Obtém a taxa que deveria ter sido aplicada para um período específico
         """
         try:
-            if tipo == 'IPCA':
-                colecao = self.db.ipca_entity
-            elif tipo == 'IGPM':
-                colecao = self.db.igpm_entity
-            else:
+            if tipo not in ('IPCA', 'IGPM'):
                 return None
             
-            documento = colecao.find_one({
-                'anoReferencia': ano,
-                'mesReferencia': mes
-            })
-            
-            if documento:
-                valor_percentual = self._converter_decimal128_para_float(documento['valor'])
-                taxa_fator = 1 + (valor_percentual / 100)
-                return taxa_fator
-            
-            return None
+            return self._consultar_taxa_fator(ano, mes, tipo)
             
         except Exception as e:
             logger.error(f"Erro ao obter taxa esperada para {mes:02d}/{ano}: {e}")
             return None
     
-    def _calcular_prioridade_gap(self, data_gap: datetime, valor_base: float) -> str:
+    def _calcular_prioridade_gap(self, data_gap: datetime, valor_base: float, *,
+                                 now: Optional[datetime] = None) -> str:
         """
         Calcula prioridade do gap baseado na data e valor
+        
+        Atraso acima de 3 anos (365,25 dias/ano) é ALTA e acima de 1 ano é MEDIA. Os limites
+        são calculados uma vez por data de referência (now, padrão: agora).
         """
-        data_atual = datetime.now(timezone.utc)
+        data_atual = now or datetime.now(timezone.utc)
+        _, limite_alta, limite_media = self._obter_limites_prioridade(data_atual)
         
         # Garantir que data_gap também tenha timezone para comparação
         if data_gap.tzinfo is None:
             data_gap = data_gap.replace(tzinfo=timezone.utc)
-            
-        anos_atraso = (data_atual - data_gap).days / 365.25
         
-        if anos_atraso > 3:
+        if data_gap <= limite_alta:
             return 'ALTA'
-        elif anos_atraso > 1:
+        if data_gap <= limite_media:
             return 'MEDIA'
-        else:
-            return 'BAIXA'
+        return 'BAIXA'
+    
+    def _obter_limites_prioridade(self, data_atual: datetime) -> Tuple[datetime, datetime, datetime]:
+        """
+        (data de referência, limite ALTA, limite MEDIA), memoizado pela data de referência
+        """
+        limites = self._limites_prioridade
+        if limites is None or limites[0] != data_atual:
+            # (data_atual - data_gap).days / 365.25 > 3  <=>  .days >= 1096 (idem > 1 <=> >= 366)
+            limites = (data_atual, data_atual - timedelta(days=1096), data_atual - timedelta(days=366))
+            self._limites_prioridade = limites
+        return limites
     
     def _obter_valor_atual_cco(self, cco: Dict[str, Any]) -> float:
         """
@@ -813,31 +1348,23 @@ class IPCAGapAnalyzer:
         """
         correcoes = cco.get('correcoesMonetarias', [])
         if correcoes:
-            return self._converter_decimal128_para_float(
+            return _para_float(
                 correcoes[-1].get('valorReconhecidoComOH', 0)
             )
         
-        return self._converter_decimal128_para_float(cco.get('valorReconhecidoComOH', 0))
+        return _para_float(cco.get('valorReconhecidoComOH', 0))
     
     def _obter_valor_raiz_cco(self, cco: Dict[str, Any]) -> float:
         """
         Obtém o valor da raiz da CCO
         """
-        return self._converter_decimal128_para_float(cco.get('valorReconhecidoComOH', 0))
+        return _para_float(cco.get('valorReconhecidoComOH', 0))
     
     def _converter_decimal128_para_float(self, valor) -> float:
         """
         Converte Decimal128 para float de forma segura
         """
-        if valor is None:
-            return 0.0
-        
-        try:
-            if hasattr(valor, 'to_decimal'):
-                return float(valor.to_decimal())
-            return float(valor)
-        except:
-            return 0.0
+        return _para_float(valor)
         
     def _mapear_todas_correcoes_cronologicas(self, cco: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -848,34 +1375,28 @@ class IPCAGapAnalyzer:
         """
         correcoes_cronologicas = []
         
-        correcoes_monetarias = cco.get('correcoesMonetarias', [])
-        
-        for correcao in correcoes_monetarias:
-            data_correcao = self._extrair_data_correcao(correcao)
-            if not data_correcao:
-                continue
-                
+        # Datas já convertidas e ordenadas no índice da CCO
+        for data_correcao, correcao in self._index_correcoes(cco).datadas:
             tipo_correcao = correcao.get('tipo', '').upper()
             
-            # Calcular impacto da correção
-            valor_antes = correcao.get('valorReconhecidoComOhOriginal', 0)
-            valor_depois = correcao.get('valorReconhecidoComOH', 0)
-            valor_impacto = self._converter_decimal128_para_float(valor_depois) - self._converter_decimal128_para_float(valor_antes)
+            # Calcular impacto da correção (cada valor convertido uma única vez)
+            valor_antes = _para_float(correcao.get('valorReconhecidoComOhOriginal', 0))
+            valor_depois = _para_float(correcao.get('valorReconhecidoComOH', 0))
             
             correcao_info = {
                 'data_aplicacao': data_correcao,
                 'tipo': tipo_correcao,
-                'valor_antes': self._converter_decimal128_para_float(valor_antes),
-                'valor_depois': self._converter_decimal128_para_float(valor_depois),
-                'valor_impacto': valor_impacto,
-                'taxa_correcao': self._converter_decimal128_para_float(correcao.get('taxaCorrecao', 1.0)),
+                'valor_antes': valor_antes,
+                'valor_depois': valor_depois,
+                'valor_impacto': valor_depois - valor_antes,
+                'taxa_correcao': _para_float(correcao.get('taxaCorrecao', 1.0)),
                 'ativo': correcao.get('ativo', True)
             }
             
             correcoes_cronologicas.append(correcao_info)
         
-        # Ordenar por data de aplicação
-        return sorted(correcoes_cronologicas, key=lambda x: x['data_aplicacao'])
+        # Já em ordem de data de aplicação
+        return correcoes_cronologicas
 
     def _identificar_alteracoes_entre_datas(self, correcoes_cronologicas: List[Dict[str, Any]], 
                                       data_inicio: datetime, data_fim: datetime,
@@ -894,12 +1415,17 @@ class IPCAGapAnalyzer:
         """
         alteracoes_no_periodo = []
         
-        for correcao in correcoes_cronologicas:
+        # Lista ordenada: busca binária do início do período e parada ao passar do fim
+        inicio = bisect_left(correcoes_cronologicas, data_inicio, key=lambda x: x['data_aplicacao'])
+        
+        for correcao in islice(correcoes_cronologicas, inicio, None):
             data_correcao = correcao['data_aplicacao']
             tipo_correcao = correcao['tipo']
             
             # Verificar se a correção está no período de interesse
-            if data_inicio <= data_correcao <= data_fim:
+            if data_correcao > data_fim:
+                break
+            if data_inicio <= data_correcao:
                 # Excluir a própria correção IPCA/IGPM que estamos analisando
                 if tipo_correcao not in ['IPCA', 'IGPM']:
                     alteracao_info = {
@@ -932,12 +1458,9 @@ class IPCAGapAnalyzer:
             Valor base original (antes das alterações no período)
         """
         
-        # Se houve alterações, calcular o valor antes da primeira alteração
-        valor_atual = self._obter_valor_atual_cco(cco)
-        
-        # Reverter as alterações para obter o valor original
-        for alteracao in reversed(alteracoes_no_periodo):  # Reverter em ordem inversa
-            valor_atual -= alteracao['valor_impacto']
+        # Se houve alterações, calcular o valor antes da primeira alteração:
+        # reverter as alterações (impacto total) para obter o valor original
+        valor_atual = self._obter_valor_atual_cco(cco) - sum(map(_IMPACTO_DA_ALTERACAO, alteracoes_no_periodo))
             
         # recuperar o ultimo item alteracoes_no_periodo
         if alteracoes_no_periodo and len(alteracoes_no_periodo) == 1:   
@@ -950,189 +1473,28 @@ class IPCAGapAnalyzer:
         return valor_atual, valor_antes, valor_depois
     
     def exportar_gaps_csv(self, resultado_analise: Dict[str, Any], 
-                     arquivo_saida: str = "gaps_ipca_igpm.csv") -> bool:
+                     arquivo_saida: str = "gaps_ipca_igpm.csv",
+                     incluir_valor_zero: bool = True) -> bool:
         """
         Exporta resultado da análise para CSV (incluindo correções fora do período e NOVO CENÁRIO)
         
         ATUALIZAÇÃO: Inclui informações sobre alterações encontradas entre o período devido e aplicado
+        
+        Com incluir_valor_zero=False, gaps com valor base zero (sem impacto financeiro)
+        são omitidos antes da montagem das linhas.
         """
         try:
-            with open(arquivo_saida, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = [
-                    'cco_id', 'contrato', 'campo', 'remessa', 'fase', 
-                    'data_reconhecimento', 'valor_atual', 'tipo_problema',
-                    # Campos de gap
-                    'gap_ano', 'gap_mes', 'gap_data_aniversario', 
-                    'gap_valor_base', 'gap_prioridade',
-                    # Campos de correção fora do período
-                    'correcao_ano_aniversario', 'correcao_mes_aniversario',
-                    'correcao_ano_aplicado', 'correcao_mes_aplicado',
-                    'data_limite_aplicacao', 'data_efetiva_aplicacao', 'dias_atraso',
-                    'tipo_correcao', 'taxa_aplicada', 'taxa_esperada',
-                    'diferenca_taxa', 'necessita_ajuste',
-                    # NOVOS CAMPOS: Alterações no período
-                    'teve_alteracoes_no_periodo', 'qtd_alteracoes_no_periodo',
-                    'valor_base_original', 'valor_base_na_aplicacao',
-                    'tipos_alteracoes_encontradas', 'datas_alteracoes',
-                    'valores_impacto_alteracoes', 'impacto_total_alteracoes',
-                    'duplicata_periodo', 'duplicata_valor_removido'
-                ]
-                
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
+            with _abrir_para_substituicao(arquivo_saida, 'w', newline='', encoding='utf-8',
+                                          buffering=TAMANHO_BUFFER_EXPORTACAO) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(CAMPOS_CSV_GAPS)
                 
-                # Exportar gaps (sem alteração)
-                for cco in resultado_analise.get('ccos_com_gaps', []):
-                    for gap in cco['gaps']:
-                        try:
-                            writer.writerow({
-                                'cco_id': cco['_id'],
-                                'contrato': cco.get('contratoCpp', ''), 
-                                'campo': cco.get('campo', ''),
-                                'remessa': cco.get('remessa', ''),
-                                'fase': cco.get('faseRemessa', ''),
-                                'data_reconhecimento': cco.get('dataReconhecimento', ''),
-                                'valor_atual': cco.get('valorAtual', 0),
-                                'tipo_problema': 'GAP',
-                                'gap_ano': gap['ano'],
-                                'gap_mes': gap['mes'],
-                                'gap_data_aniversario': gap['data_aniversario'],
-                                'gap_valor_base': gap['valor_base'],
-                                'gap_prioridade': gap['prioridade'],
-                                # Campos de correção vazios para gaps
-                                'correcao_ano_aniversario': '',
-                                'correcao_mes_aniversario': '',
-                                'correcao_ano_aplicado': '',
-                                'correcao_mes_aplicado': '',
-                                'data_limite_aplicacao': '',
-                                'data_efetiva_aplicacao': '',
-                                'dias_atraso': '',
-                                'tipo_correcao': '',
-                                'taxa_aplicada': '',
-                                'taxa_esperada': '',
-                                'diferenca_taxa': '',
-                                'necessita_ajuste': '',
-                                # Novos campos vazios para gaps
-                                'teve_alteracoes_no_periodo': '',
-                                'qtd_alteracoes_no_periodo': '',
-                                'valor_base_original': '',
-                                'valor_base_na_aplicacao': '',
-                                'tipos_alteracoes_encontradas': '',
-                                'datas_alteracoes': '',
-                                'valores_impacto_alteracoes': '',
-                                'impacto_total_alteracoes': '',
-                                # Novos campos vazios para duplicatas
-                                'duplicata_periodo' : '',
-                                'duplicata_valor_removido': ''
-                            })
-                        except Exception as e:
-                            logging.error(f"Erro ao exportar gap para CSV: {str(e)}")
-                        
-                for cco in resultado_analise.get('ccos_com_duplicatas', []):
-                    for duplicata in cco['duplicatas']:
-                        try:
-                            writer.writerow({
-                                'cco_id': cco['_id'],
-                                'contrato': cco.get('contratoCpp', ''),
-                                'campo': duplicata.get('campo', ''),
-                                'remessa': duplicata.get('remessa', ''),
-                                'fase': duplicata.get('faseRemessa', ''),
-                                'data_reconhecimento': duplicata.get('dataReconhecimento', ''),
-                                'valor_atual': cco.get('valorAtual', 0),
-                                'tipo_problema': 'DUPLICATA',
-                                # Campos de gap vazios para correções
-                                'gap_ano': '',
-                                'gap_mes': '',
-                                'gap_data_aniversario': '',
-                                'gap_valor_base': '',
-                                'gap_prioridade': '',
-                                # Campos de correção vazios para gaps
-                                'correcao_ano_aniversario': '',
-                                'correcao_mes_aniversario': '',
-                                'correcao_ano_aplicado': '',
-                                'correcao_mes_aplicado': '',
-                                'data_limite_aplicacao': '',
-                                'data_efetiva_aplicacao': '',
-                                'dias_atraso': '',
-                                'tipo_correcao': '',
-                                'taxa_aplicada': '',
-                                'taxa_esperada': '',
-                                'diferenca_taxa': '',
-                                'necessita_ajuste': '',
-                                # Novos campos vazios para gaps
-                                'teve_alteracoes_no_periodo': '',
-                                'qtd_alteracoes_no_periodo': '',
-                                'valor_base_original': '',
-                                'valor_base_na_aplicacao': '',
-                                'tipos_alteracoes_encontradas': '',
-                                'datas_alteracoes': '',
-                                'valores_impacto_alteracoes': '',
-                                'impacto_total_alteracoes': '',
-                                'duplicata_periodo': duplicata['periodo'],
-                                'duplicata_valor_removido': duplicata['valor_duplicado']
-                                
-                            })
-                        except Exception as e:
-                            logging.error(f"Erro ao exportar duplicata para CSV: {str(e)}")
-                            
-                            
-                # Exportar correções fora do período (ATUALIZADO COM NOVOS CAMPOS)
-                for cco in resultado_analise.get('ccos_com_correcoes_fora_periodo', []):
-                    for correcao in cco['correcoes_fora_periodo']:
-                        # Processar alterações no período
-                        alteracoes = correcao.get('alteracoes_no_periodo', [])
-                        teve_alteracoes = correcao.get('teve_alteracoes_no_periodo', False)
-                        
-                        # Preparar strings para alterações
-                        tipos_alteracoes = ';'.join([alt['tipo'] for alt in alteracoes]) if alteracoes else ''
-                        datas_alteracoes = ';'.join([alt['data_aplicacao'] for alt in alteracoes]) if alteracoes else ''
-                        valores_impacto = ';'.join([f"{alt['valor_impacto']:,.2f}" for alt in alteracoes]) if alteracoes else ''
-                        impacto_total = sum([alt['valor_impacto'] for alt in alteracoes]) if alteracoes else 0
-                        
-                        try:
-                            writer.writerow({
-                                'cco_id': cco['_id'],
-                                'contrato': cco.get('contratoCpp', ''),
-                                'campo': cco.get('campo', ''),
-                                'remessa': cco.get('remessa', ''),
-                                'fase': cco.get('faseRemessa', ''),
-                                'data_reconhecimento': cco.get('dataReconhecimento', ''),
-                                'valor_atual': cco.get('valorAtual', 0),
-                                'tipo_problema': 'CORRECAO_FORA_PERIODO_COM_ALTERACAO' if teve_alteracoes else 'CORRECAO_FORA_PERIODO',
-                                # Campos de gap vazios para correções
-                                'gap_ano': '',
-                                'gap_mes': '',
-                                'gap_data_aniversario': '',
-                                'gap_valor_base': '',
-                                'gap_prioridade': '',
-                                # Campos de correção preenchidos
-                                'correcao_ano_aniversario': correcao['ano_aniversario'],
-                                'correcao_mes_aniversario': correcao['mes_aniversario'],
-                                'correcao_ano_aplicado': correcao['ano_aplicado'],
-                                'correcao_mes_aplicado': correcao['mes_aplicado'],
-                                'data_limite_aplicacao': correcao['data_limite'],
-                                'data_efetiva_aplicacao': correcao['data_aplicacao'],
-                                'dias_atraso': correcao['dias_atraso'],
-                                'tipo_correcao': correcao['tipo_correcao'],
-                                'taxa_aplicada': correcao['taxa_aplicada'],
-                                'taxa_esperada': correcao['taxa_esperada'],
-                                'diferenca_taxa': correcao['diferenca_taxa'],
-                                'necessita_ajuste': correcao['necessita_ajuste'],
-                                # NOVOS CAMPOS: Informações sobre alterações
-                                'teve_alteracoes_no_periodo': 'SIM' if teve_alteracoes else 'NÃO',
-                                'qtd_alteracoes_no_periodo': len(alteracoes),
-                                'valor_base_original': correcao.get('valor_base_antes_alteracoes', ''),
-                                'valor_base_na_aplicacao': correcao.get('valor_base_na_aplicacao', ''),
-                                'tipos_alteracoes_encontradas': tipos_alteracoes,
-                                'datas_alteracoes': datas_alteracoes,
-                                'valores_impacto_alteracoes': valores_impacto,
-                                'impacto_total_alteracoes': f"{impacto_total:,.2f}" if impacto_total != 0 else '',
-                                # Novos campos vazios para duplicatas
-                                'duplicata_periodo' : '',
-                                'duplicata_valor_removido': ''
-                            })
-                        except Exception as e:
-                            logging.error(f"Erro ao exportar correção fora do período para CSV: {str(e)}")    
+                # Linhas geradas sob demanda: gaps, duplicatas e correções fora do período
+                writer.writerows(chain(
+                    self._iter_linhas_csv_gaps(resultado_analise, incluir_valor_zero),
+                    self._iter_linhas_csv_duplicatas(resultado_analise),
+                    self._iter_linhas_csv_correcoes_fora(resultado_analise)
+                ))
             
             logger.info(f"Relatório de gaps e correções exportado para: {arquivo_saida}")
             return True
@@ -1141,14 +1503,167 @@ class IPCAGapAnalyzer:
             logger.error(f"Erro ao exportar gaps para CSV: {e}")
             return False
     
+    def _iter_linhas_csv_gaps(self, resultado_analise: Dict[str, Any],
+                              incluir_valor_zero: bool = True) -> Iterator[Tuple[Any, ...]]:
+        """
+        Gera as linhas de CSV dos gaps (campos de correção/duplicata vazios)
+        """
+        # Falhas de linha são contadas e registradas uma vez ao final
+        erros = 0
+        primeiro_erro = None
+        for cco in resultado_analise.get('ccos_com_gaps', []):
+            # Campos da CCO, comuns a todas as linhas
+            cco_id = cco['_id']
+            contrato = cco.get('contratoCpp', '')
+            campo = cco.get('campo', '')
+            remessa = cco.get('remessa', '')
+            fase = cco.get('faseRemessa', '')
+            data_reconhecimento = cco.get('dataReconhecimento', '')
+            valor_atual = cco.get('valorAtual', 0)
+            
+            gaps = cco['gaps'] if incluir_valor_zero else _gaps_com_valor(cco['gaps'])
+            for gap in gaps:
+                try:
+                    yield (
+                        cco_id, contrato, campo, remessa, fase,
+                        data_reconhecimento, valor_atual, 'GAP',
+                        # Campos de gap
+                        gap['ano'], gap['mes'], gap['data_aniversario'],
+                        gap['valor_base'], gap['prioridade'],
+                        *_CSV_VAZIO_CORRECAO,
+                        *_CSV_VAZIO_DUPLICATA,
+                    )
+                except Exception as e:
+                    erros += 1
+                    primeiro_erro = primeiro_erro or e
+        
+        if erros:
+            logger.error(f"Erro ao exportar {erros} linha(s) de gap para CSV: {str(primeiro_erro)}")
+    
+    def _iter_linhas_csv_duplicatas(self, resultado_analise: Dict[str, Any]) -> Iterator[Tuple[Any, ...]]:
+        """
+        Gera as linhas de CSV das correções duplicadas
+        """
+        # Falhas de linha são contadas e registradas uma vez ao final
+        erros = 0
+        primeiro_erro = None
+        for cco in resultado_analise.get('ccos_com_duplicatas', []):
+            # Campos da CCO, comuns a todas as linhas (demais vêm da própria duplicata)
+            cco_id = cco['_id']
+            contrato = cco.get('contratoCpp', '')
+            valor_atual = cco.get('valorAtual', 0)
+            
+            for duplicata in cco['duplicatas']:
+                try:
+                    yield (
+                        cco_id, contrato,
+                        duplicata.get('campo', ''),
+                        duplicata.get('remessa', ''),
+                        duplicata.get('faseRemessa', ''),
+                        duplicata.get('dataReconhecimento', ''),
+                        valor_atual, 'DUPLICATA',
+                        *_CSV_VAZIO_GAP,
+                        *_CSV_VAZIO_CORRECAO,
+                        # Campos de duplicata
+                        duplicata['periodo'], duplicata['valor_duplicado'],
+                    )
+                except Exception as e:
+                    erros += 1
+                    primeiro_erro = primeiro_erro or e
+        
+        if erros:
+            logger.error(f"Erro ao exportar {erros} linha(s) de duplicata para CSV: {str(primeiro_erro)}")
+    
+    def _iter_linhas_csv_correcoes_fora(self, resultado_analise: Dict[str, Any]) -> Iterator[Tuple[Any, ...]]:
+        """
+        Gera as linhas de CSV das correções fora do período (com alterações no período)
+        """
+        # Falhas de linha são contadas e registradas uma vez ao final
+        erros = 0
+        primeiro_erro = None
+        for cco in resultado_analise.get('ccos_com_correcoes_fora_periodo', []):
+            # Campos da CCO, comuns a todas as linhas
+            cco_id = cco['_id']
+            contrato = cco.get('contratoCpp', '')
+            campo = cco.get('campo', '')
+            remessa = cco.get('remessa', '')
+            fase = cco.get('faseRemessa', '')
+            data_reconhecimento = cco.get('dataReconhecimento', '')
+            valor_atual = cco.get('valorAtual', 0)
+            
+            for correcao in cco['correcoes_fora_periodo']:
+                # Processar alterações no período
+                alteracoes = correcao.get('alteracoes_no_periodo', [])
+                teve_alteracoes = correcao.get('teve_alteracoes_no_periodo', False)
+                
+                # Preparar strings para alterações (formatadas uma vez por correção, fora do try)
+                if alteracoes:
+                    tipos_alteracoes = ';'.join([alt['tipo'] for alt in alteracoes])
+                    datas_alteracoes = ';'.join([alt['data_aplicacao'] for alt in alteracoes])
+                    valores_impacto = ';'.join([f"{alt['valor_impacto']:,.2f}" for alt in alteracoes])
+                    impacto_total = sum([alt['valor_impacto'] for alt in alteracoes])
+                else:
+                    tipos_alteracoes = datas_alteracoes = valores_impacto = ''
+                    impacto_total = 0
+                impacto_formatado = f"{impacto_total:,.2f}" if impacto_total != 0 else ''
+                if teve_alteracoes:
+                    tipo_linha, teve_alteracoes_csv = 'CORRECAO_FORA_PERIODO_COM_ALTERACAO', 'SIM'
+                else:
+                    tipo_linha, teve_alteracoes_csv = 'CORRECAO_FORA_PERIODO', 'NÃO'
+                
+                try:
+                    yield (
+                        cco_id, contrato, campo, remessa, fase,
+                        data_reconhecimento, valor_atual, tipo_linha,
+                        *_CSV_VAZIO_GAP,
+                        # Campos de correção preenchidos (extraídos de uma vez)
+                        *_CAMPOS_CSV_CORRECAO_FORA(correcao),
+                        # NOVOS CAMPOS: Informações sobre alterações
+                        teve_alteracoes_csv,
+                        len(alteracoes),
+                        correcao.get('valor_base_antes_alteracoes', ''),
+                        correcao.get('valor_base_na_aplicacao', ''),
+                        tipos_alteracoes,
+                        datas_alteracoes,
+                        valores_impacto,
+                        impacto_formatado,
+                        *_CSV_VAZIO_DUPLICATA,
+                    )
+                except Exception as e:
+                    erros += 1
+                    primeiro_erro = primeiro_erro or e
+        
+        if erros:
+            logger.error(f"Erro ao exportar {erros} linha(s) de correção fora do período para CSV: {str(primeiro_erro)}")
+    
     def exportar_gaps_json(self, resultado_analise: Dict[str, Any], 
-                          arquivo_saida: str = "gaps_ipca_igpm.json") -> bool:
+                          arquivo_saida: str = "gaps_ipca_igpm.json",
+                          compressao: Optional[str] = None) -> bool:
         """
         Exporta resultado da análise para JSON
+        
+        Args:
+            compressao: None (JSON puro), 'gz' (gzip) ou 'zst' (zstandard, se instalado)
         """
         try:
-            with open(arquivo_saida, 'w', encoding='utf-8') as jsonfile:
-                json.dump(resultado_analise, jsonfile, indent=2, ensure_ascii=False, default=str)
+            if compressao is not None:
+                self._exportar_json_compactado(resultado_analise, arquivo_saida, compressao)
+            elif orjson is not None:
+                listas_grandes = any(
+                    isinstance(valor, list) and len(valor) >= LIMITE_JSON_EM_PARTES
+                    for valor in resultado_analise.values()
+                )
+                if listas_grandes:
+                    with _abrir_para_substituicao(arquivo_saida, 'wb',
+                                                  buffering=TAMANHO_BUFFER_EXPORTACAO) as jsonfile:
+                        self._escrever_json_em_partes(resultado_analise, jsonfile)
+                else:
+                    with _abrir_para_substituicao(arquivo_saida, 'wb') as jsonfile:
+                        jsonfile.write(self._serializar_json(resultado_analise))
+            else:
+                with _abrir_para_substituicao(arquivo_saida, 'w', encoding='utf-8',
+                                              buffering=TAMANHO_BUFFER_EXPORTACAO) as jsonfile:
+                    json.dump(resultado_analise, jsonfile, indent=2, ensure_ascii=False, default=str)
             
             logger.info(f"Relatório de gaps exportado para: {arquivo_saida}")
             return True
@@ -1157,13 +1672,100 @@ class IPCAGapAnalyzer:
             logger.error(f"Erro ao exportar gaps para JSON: {e}")
             return False
     
+    def _exportar_json_compactado(self, resultado_analise: Dict[str, Any],
+                                  arquivo_saida: str, compressao: str) -> None:
+        """
+        Grava o JSON (mesmo conteúdo da exportação sem compressão) em um fluxo gzip/zstd
+        """
+        if compressao == 'zst' and zstandard is None:
+            raise ValueError("compressão 'zst' requer o pacote zstandard")
+        if compressao not in ('gz', 'zst'):
+            raise ValueError(f"Compressão não suportada: {compressao}")
+        
+        with _abrir_para_substituicao(arquivo_saida, 'wb', buffering=TAMANHO_BUFFER_EXPORTACAO) as bruto:
+            if compressao == 'gz':
+                # filename: o cabeçalho gzip registra o nome final, não o do temporário
+                saida = gzip.GzipFile(filename=arquivo_saida, mode='wb', fileobj=bruto,
+                                      compresslevel=NIVEL_COMPRESSAO_JSON)
+            else:
+                saida = zstandard.ZstdCompressor(level=NIVEL_COMPRESSAO_JSON).stream_writer(bruto)
+            
+            with saida:
+                if orjson is not None:
+                    # Serialização item a item: o compressor consome o JSON à medida que é gerado
+                    self._escrever_json_em_partes(resultado_analise, saida)
+                else:
+                    texto = io.TextIOWrapper(saida, encoding='utf-8')
+                    json.dump(resultado_analise, texto, indent=2, ensure_ascii=False, default=str)
+                    texto.flush()
+                    texto.detach()
+    
+    def carregar_gaps_json(self, arquivo_entrada: str = "gaps_ipca_igpm.json") -> Optional[Dict[str, Any]]:
+        """
+        Carrega um resultado de análise exportado por exportar_gaps_json
+        
+        Leitor recomendado para reaproveitar exportações nos relatórios/impacto: usa orjson
+        quando disponível (json da biblioteca padrão caso contrário). Datas voltam como texto.
+        """
+        try:
+            if orjson is not None:
+                with open(arquivo_entrada, 'rb') as jsonfile:
+                    return orjson.loads(jsonfile.read())
+            with open(arquivo_entrada, 'r', encoding='utf-8') as jsonfile:
+                return json.load(jsonfile)
+            
+        except Exception as e:
+            logger.error(f"Erro ao carregar gaps do JSON: {e}")
+            return None
+    
+    def _serializar_json(self, valor: Any, indentacao: bytes = b'') -> bytes:
+        """
+        Serializa com orjson (indentação 2), deslocando as linhas para o nível de aninhamento
+        """
+        # Datas passam pelo default=str, como no json da biblioteca padrão
+        conteudo = orjson.dumps(
+            valor,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+        )
+        # Strings JSON não contêm quebras de linha literais: toda quebra é de formatação
+        return conteudo.replace(b'\n', b'\n' + indentacao) if indentacao else conteudo
+    
+    def _escrever_json_em_partes(self, resultado_analise: Dict[str, Any], jsonfile) -> None:
+        """
+        Escreve o JSON serializando as listas grandes item a item (mesma saída do dump único)
+        
+        O pico de memória fica em um item (CCO) serializado, e não no documento inteiro.
+        """
+        if not resultado_analise:
+            jsonfile.write(b'{}')
+            return
+        
+        separador = b'{\n  '
+        for chave, valor in resultado_analise.items():
+            jsonfile.write(separador)
+            jsonfile.write(orjson.dumps(str(chave)) + b': ')
+            separador = b',\n  '
+            
+            if isinstance(valor, list) and len(valor) >= LIMITE_JSON_EM_PARTES:
+                separador_item = b'[\n    '
+                for item in valor:
+                    jsonfile.write(separador_item)
+                    jsonfile.write(self._serializar_json(item, b'    '))
+                    separador_item = b',\n    '
+                jsonfile.write(b'\n  ]')
+            else:
+                jsonfile.write(self._serializar_json(valor, b'  '))
+        jsonfile.write(b'\n}')
+    
     def gerar_relatorio_resumido(self, resultado_analise: Dict[str, Any]) -> str:
         """
         Gera relatório resumido em texto
         """
         stats = resultado_analise.get('estatisticas', {})
         
-        relatorio = f"""
+        partes = [f"""
 === RELATÓRIO DE GAPS IPCA/IGPM ===
 
 Data da Análise: {resultado_analise.get('data_analise', 'N/A')}
@@ -1174,18 +1776,45 @@ ESTATÍSTICAS GERAIS:
 - Total de gaps identificados: {stats.get('total_gaps_identificados', 0):,}
 - Valor total impactado: R$ {stats.get('valor_total_impactado', 0):,.2f}
 
-GAPS POR ANO:"""
+GAPS POR ANO:"""]
+        
+        for ano, gaps in self._contagens_ordenadas(stats, 'gaps_por_ano'):
+            partes.append(f"\n- {ano}: {gaps} gaps")
         
-        gaps_por_ano = stats.get('gaps_por_ano', {})
-        for ano in sorted(gaps_por_ano.keys()):
-            relatorio += f"\n- {ano}: {gaps_por_ano[ano]} gaps"
+        partes.append("\n\nGAPS POR CONTRATO:")
+        for contrato, gaps in self._contagens_ordenadas(stats, 'gaps_por_contrato'):
+            partes.append(f"\n- {contrato}: {gaps} gaps")
         
-        relatorio += "\n\nGAPS POR CONTRATO:"
-        gaps_por_contrato = stats.get('gaps_por_contrato', {})
-        for contrato in sorted(gaps_por_contrato.keys()):
-            relatorio += f"\n- {contrato}: {gaps_por_contrato[contrato]} gaps"
+        return "".join(partes)
+    
+    def _contagens_ordenadas(self, stats: Dict[str, Any], campo: str,
+                             por_quantidade: bool = False,
+                             limite: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """
+        Retorna os itens de stats[campo] ordenados pela chave ou pela quantidade (decrescente)
         
-        return relatorio
+        A ordenação é feita uma vez por estatística e reaproveitada pelos relatórios
+        gerados a partir da mesma análise. Com limite (top-N por quantidade), seleciona
+        apenas os N maiores via heap, sem ordenar todos os itens.
+        """
+        cache = self._estatisticas_ordenadas
+        if cache is None or cache[0] is not stats:
+            cache = (stats, {})
+            self._estatisticas_ordenadas = cache
+        
+        chave = (campo, por_quantidade, limite)
+        ordenados = cache[1].get(chave)
+        if ordenados is None:
+            contagens = stats.get(campo, {})
+            if por_quantidade and limite is not None:
+                # Mesma ordem (inclusive empates) de sorted(..., reverse=True)[:limite]
+                ordenados = heapq.nlargest(limite, contagens.items(), key=_QUANTIDADE_DO_ITEM)
+            elif por_quantidade:
+                ordenados = sorted(contagens.items(), key=_QUANTIDADE_DO_ITEM, reverse=True)
+            else:
+                ordenados = sorted(contagens.items())
+            cache[1][chave] = ordenados
+        return ordenados
     
     def analisar_impacto_financeiro(self, resultado_analise: Dict[str, Any], 
                                    taxa_ipca_estimada: float = 0.045) -> Dict[str, Any]:
@@ -1199,28 +1828,77 @@ GAPS POR ANO:"""
         Returns:
             Análise de impacto financeiro
         """
+        ccos_com_gaps = resultado_analise.get('ccos_com_gaps', [])
+        
+        if _agregar_impacto is not None:
+            total_gaps = sum(len(cco['gaps']) for cco in ccos_com_gaps)
+            if total_gaps >= LIMITE_AGREGACAO_JIT:
+                impacto_total, impactos_por_contrato, impactos_por_ano = self._agregar_impacto_compilado(
+                    ccos_com_gaps, total_gaps, taxa_ipca_estimada
+                )
+                return self._montar_impacto_financeiro(
+                    resultado_analise, taxa_ipca_estimada, impacto_total,
+                    impactos_por_contrato, impactos_por_ano
+                )
+        
         impacto_total = 0.0
         impactos_por_contrato = {}
-        impactos_por_ano = {}
+        impactos_por_ano = defaultdict(float)
         
-        for cco in resultado_analise.get('ccos_com_gaps', []):
+        for cco in ccos_com_gaps:
             contrato = cco.get('contratoCpp', 'N/A')
-            
-            if contrato not in impactos_por_contrato:
-                impactos_por_contrato[contrato] = 0.0
+            # Acumulado do contrato em variável local, gravado uma vez por CCO
+            impacto_contrato = impactos_por_contrato.get(contrato, 0.0)
             
             for gap in cco['gaps']:
                 valor_base = gap['valor_base']
                 impacto_gap = valor_base * taxa_ipca_estimada
                 
                 impacto_total += impacto_gap
-                impactos_por_contrato[contrato] += impacto_gap
-                
-                ano = gap['ano']
-                if ano not in impactos_por_ano:
-                    impactos_por_ano[ano] = 0.0
-                impactos_por_ano[ano] += impacto_gap
+                impacto_contrato += impacto_gap
+                impactos_por_ano[gap['ano']] += impacto_gap
+            
+            impactos_por_contrato[contrato] = impacto_contrato
         
+        return self._montar_impacto_financeiro(
+            resultado_analise, taxa_ipca_estimada, impacto_total,
+            impactos_por_contrato, dict(impactos_por_ano)
+        )
+    
+    def _agregar_impacto_compilado(self, ccos_com_gaps: List[Dict[str, Any]], total_gaps: int,
+                                   taxa_ipca_estimada: float) -> Tuple[float, Dict[str, float], Dict[int, float]]:
+        """
+        Agrega o impacto via kernel Numba (ou NumPy), preservando a ordem das chaves do cálculo em Python
+        """
+        valores = np.empty(total_gaps)
+        ano_ids = np.empty(total_gaps, dtype=np.int64)
+        contrato_ids = np.empty(total_gaps, dtype=np.int64)
+        id_por_contrato = {}
+        id_por_ano = {}
+        
+        i = 0
+        for cco in ccos_com_gaps:
+            contrato_id = id_por_contrato.setdefault(cco.get('contratoCpp', 'N/A'), len(id_por_contrato))
+            for gap in cco['gaps']:
+                valores[i] = gap['valor_base']
+                ano_ids[i] = id_por_ano.setdefault(gap['ano'], len(id_por_ano))
+                contrato_ids[i] = contrato_id
+                i += 1
+        
+        total, por_contrato, por_ano = _agregar_impacto(
+            valores, ano_ids, contrato_ids, float(taxa_ipca_estimada),
+            len(id_por_contrato), len(id_por_ano)
+        )
+        impactos_por_contrato = {contrato: float(por_contrato[idx]) for contrato, idx in id_por_contrato.items()}
+        impactos_por_ano = {ano: float(por_ano[idx]) for ano, idx in id_por_ano.items()}
+        return float(total), impactos_por_contrato, impactos_por_ano
+    
+    def _montar_impacto_financeiro(self, resultado_analise: Dict[str, Any], taxa_ipca_estimada: float,
+                                   impacto_total: float, impactos_por_contrato: Dict[str, float],
+                                   impactos_por_ano: Dict[int, float]) -> Dict[str, Any]:
+        """
+        Monta o dicionário de retorno de analisar_impacto_financeiro
+        """
         return {
             'taxa_ipca_utilizada': taxa_ipca_estimada,
             'impacto_financeiro_total': impacto_total,
@@ -1236,17 +1914,47 @@ class IPCAGapReportGenerator:
     
     def __init__(self, gap_analyzer: IPCAGapAnalyzer):
         self.analyzer = gap_analyzer
+        # {chave do filtro: resultado de analisar_gaps_sistema}, em ordem de inserção
+        self._analises = {}
+    
+    def limpar_cache(self):
+        """
+        Descarta as análises reaproveitadas entre relatórios (usar quando os dados mudarem)
+        """
+        self._analises.clear()
+    
+    def analisar(self, filtros: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Executa analisar_gaps_sistema uma vez por filtro, reaproveitando o resultado entre relatórios
+        """
+        try:
+            chave = frozenset((filtros or {}).items())
+            resultado = self._analises.get(chave)
+        except TypeError:
+            # Filtro com valores não-hasheáveis (ex.: operadores do Mongo): sem cache
+            return self.analyzer.analisar_gaps_sistema(filtros)
+        
+        if resultado is None:
+            resultado = self.analyzer.analisar_gaps_sistema(filtros)
+            if 'error' in resultado:
+                # Falha na análise: não reaproveitar, a próxima chamada tenta novamente
+                return resultado
+            if len(self._analises) >= TAMANHO_CACHE_ANALISES_RELATORIO:
+                # Descarta a análise mais antiga
+                del self._analises[next(iter(self._analises))]
+            self._analises[chave] = resultado
+        return resultado
     
     def gerar_relatorio_executivo(self, filtros: Dict[str, Any] = None) -> str:
         """
         Gera relatório executivo para apresentação
         """
-        resultado = self.analyzer.analisar_gaps_sistema(filtros)
+        resultado = self.analisar(filtros)
         impacto = self.analyzer.analisar_impacto_financeiro(resultado)
         
         stats = resultado.get('estatisticas', {})
         
-        relatorio = f"""
+        partes = [f"""
 === RELATÓRIO EXECUTIVO - GAPS IPCA/IGPM ===
 
 RESUMO EXECUTIVO:
@@ -1255,60 +1963,61 @@ RESUMO EXECUTIVO:
 • Valor total impactado: R$ {stats.get('valor_total_impactado', 0):,.2f}
 • Impacto financeiro estimado: R$ {impacto['impacto_financeiro_total']:,.2f}
 
-PRINCIPAIS CONTRATOS IMPACTADOS:"""
+PRINCIPAIS CONTRATOS IMPACTADOS:"""]
         
         # Top 5 contratos por gaps
-        gaps_contratos = stats.get('gaps_por_contrato', {})
-        top_contratos = sorted(gaps_contratos.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_contratos = self.analyzer._contagens_ordenadas(stats, 'gaps_por_contrato', por_quantidade=True, limite=5)
         
         for i, (contrato, gaps) in enumerate(top_contratos, 1):
             impacto_contrato = impacto['impactos_por_contrato'].get(contrato, 0)
-            relatorio += f"\n{i}. {contrato}: {gaps} gaps (R$ {impacto_contrato:,.2f})"
+            partes.append(f"\n{i}. {contrato}: {gaps} gaps (R$ {impacto_contrato:,.2f})")
         
-        relatorio += f"""
+        partes.append("""
 
-ANOS COM MAIOR INCIDÊNCIA:"""
+ANOS COM MAIOR INCIDÊNCIA:""")
         
-        gaps_anos = stats.get('gaps_por_ano', {})
-        top_anos = sorted(gaps_anos.items(), key=lambda x: x[1], reverse=True)[:3]
+        top_anos = self.analyzer._contagens_ordenadas(stats, 'gaps_por_ano', por_quantidade=True, limite=3)
         
         for ano, gaps in top_anos:
             impacto_ano = impacto['impactos_por_ano'].get(ano, 0)
-            relatorio += f"\n• {ano}: {gaps} gaps (R$ {impacto_ano:,.2f})"
+            partes.append(f"\n• {ano}: {gaps} gaps (R$ {impacto_ano:,.2f})")
         
-        return relatorio
+        return "".join(partes)
     
-    def gerar_relatorio_detalhado_contrato(self, contrato: str) -> str:
+    def gerar_relatorio_detalhado_contrato(self, contrato: str, incluir_valor_zero: bool = True) -> str:
         """
         Gera relatório detalhado para um contrato específico
+        
+        Com incluir_valor_zero=False, gaps com valor base zero não são listados.
         """
         filtros = {'contratoCpp': contrato}
-        resultado = self.analyzer.analisar_gaps_sistema(filtros)
+        resultado = self.analisar(filtros)
         
-        relatorio = f"""
+        partes = [f"""
 === RELATÓRIO DETALHADO - CONTRATO {contrato} ===
 
-"""
+"""]
         
         ccos_contrato = resultado.get('ccos_com_gaps', [])
         if not ccos_contrato:
-            relatorio += "Nenhum gap identificado para este contrato."
-            return relatorio
+            partes.append("Nenhum gap identificado para este contrato.")
+            return "".join(partes)
         
         for cco in ccos_contrato:
-            relatorio += f"""
+            partes.append(f"""
 CCO: {cco['_id']}
 Campo: {cco.get('campo', 'N/A')}
 Remessa: {cco.get('remessa', 'N/A')} (Fase: {cco.get('faseRemessa', 'N/A')})
 Valor Atual: R$ {cco.get('valorAtual', 0):,.2f}
 Data Reconhecimento: {cco.get('dataReconhecimento', 'N/A')}
 
-Gaps Identificados:"""
+Gaps Identificados:""")
             
-            for gap in cco['gaps']:
-                relatorio += f"""
-  • {gap['mes']:02d}/{gap['ano']} - Valor Base: R$ {gap['valor_base']:,.2f} (Prioridade: {gap['prioridade']})"""
+            gaps = cco['gaps'] if incluir_valor_zero else _gaps_com_valor(cco['gaps'])
+            for gap in gaps:
+                partes.append(f"""
+  • {gap['mes']:02d}/{gap['ano']} - Valor Base: R$ {gap['valor_base']:,.2f} (Prioridade: {gap['prioridade']})""")
             
-            relatorio += "\n" + "-" * 80 + "\n"
+            partes.append("\n" + "-" * 80 + "\n")
         
-        return relatorio
\ No newline at end of file
+        return "".join(partes)
\ No newline at end of file
@@ -4,17 +4,32 @@ Implementa recálculo de correções monetárias por IPCA/IGPM baseado na regra
 """
 
 import logging
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timezone
 from dateutil.relativedelta import relativedelta
 from bson import ObjectId, Decimal128
 from bson.int64 import Int64
 from decimal import Decimal
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Tuple
-from copy import deepcopy
 from app.config import IGNORAR_CORECAO_MONETARIA_VALOR_NEGATIVO
 
+# Campos lidos dos documentos de taxa (_id incluído por padrão)
+PROJECAO_TAXA = {'anoReferencia': 1, 'mesReferencia': 1, 'valor': 1, 'version': 1}
+
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=4096)
+def _converter_data_iso(data_str: str) -> datetime:
+    """
+    Converte data ISO (com 'Z' ou offset) para datetime; memoizada por string
+
+    As mesmas datas de correção são convertidas repetidamente em recálculos em lote
+    da mesma CCO; o cache fica fora dos documentos, que são persistidos.
+    """
+    return datetime.fromisoformat(data_str.replace('Z', '+00:00'))
+
 class TipoRecalculo:
     IPCA_IGPM = 'IPCA_IGPM'
 
@@ -38,6 +53,11 @@ class IPCAIGPMRecalculoService:
         """
         self.db_local = db_connection
         self.db_prd = db_connection_prd
+        # Banco das CCOs e das taxas IPCA/IGPM (principal quando informado)
+        self.db = db_connection_prd if db_connection_prd is not None else db_connection
+        
+        # Taxas por índice: {tipo: {(ano, mes): (valor percentual, _id, version)}}, carregadas uma vez por coleção
+        self._taxas_por_tipo: Dict[str, Dict[Tuple[int, int], Tuple[float, Any, Any]]] = {}
         
         
     # def identificar_gaps_ipca_igpm(self, filtros: Dict[str, Any] = None) -> List[Dict[str, Any]]:
@@ -178,8 +198,11 @@ class IPCAIGPMRecalculoService:
                 taxa_final = float(taxa_correcao)
                 observacoes_final = observacoes
             
+            # Datas das correções extraídas uma vez (valor base e posição de inserção)
+            datas_correcoes = self._datas_correcoes_ordenadas(cco_original.get('correcoesMonetarias', []))
+            
             # Obter valor base para correção
-            valor_base = self._obter_valor_base_correcao(cco_original, ano, mes)
+            valor_base = self._obter_valor_base_correcao(cco_original, ano, mes, datas_correcoes)
             if valor_base <= 0 and IGNORAR_CORECAO_MONETARIA_VALOR_NEGATIVO:
                 return {'success': False, 'error': 'Valor base para correção é zero ou negativo'}
             
@@ -188,8 +211,10 @@ class IPCAIGPMRecalculoService:
             diferenca_correcao = float(valor_base * (taxa_decimal - 1))
             novo_valor_com_oh = valor_base + diferenca_correcao
             
-            # Criar CCO recalculada
-            cco_recalculada = deepcopy(cco_original)
+            # Criar CCO recalculada: só a raiz e a lista de correções são alteradas, os valores
+            # aninhados (Decimal128, correções existentes) são compartilhados com a original
+            cco_recalculada = dict(cco_original)
+            cco_recalculada['correcoesMonetarias'] = list(cco_original.get('correcoesMonetarias', []))
             
             # Criar correção IPCA/IGPM
             data_correcao = datetime(ano, mes, 16, tzinfo=timezone.utc)  # Dia 16 como padrão
@@ -199,11 +224,8 @@ class IPCAIGPMRecalculoService:
             )
             
             # Inserir correção no ponto correto da timeline
-            if 'correcoesMonetarias' not in cco_recalculada:
-                cco_recalculada['correcoesMonetarias'] = []
-            
             posicao_insercao = self._encontrar_posicao_insercao(
-                cco_recalculada['correcoesMonetarias'], data_correcao
+                cco_recalculada['correcoesMonetarias'], data_correcao, datas_correcoes
             )
             
             # Inserir correção IPCA/IGPM
@@ -253,27 +275,68 @@ class IPCAIGPMRecalculoService:
             logger.error(f"Erro ao executar recálculo IPCA/IGPM: {e}")
             return {'success': False, 'error': str(e)}
     
+    def _carregar_taxas(self, tipo: str) -> Dict[Tuple[int, int], Tuple[float, Any, Any]]:
+        """
+        Carrega (uma vez) todas as taxas do índice em memória, indexadas por (ano, mes)
+        
+        Guarda apenas (valor percentual já convertido, _id, version) de cada período.
+        """
+        taxas = self._taxas_por_tipo.get(tipo)
+        if taxas is None:
+            colecao = self.db.igpm_entity if tipo == 'IGPM' else self.db.ipca_entity
+            taxas = {}
+            cursor = colecao.find({}, PROJECAO_TAXA)
+            for documento in cursor:
+                chave = (documento.get('anoReferencia'), documento.get('mesReferencia'))
+                # Mantém o primeiro documento do período, como o find_one faria
+                if chave not in taxas:
+                    taxas[chave] = self._resumir_taxa(documento)
+            self._taxas_por_tipo[tipo] = taxas
+        return taxas
+    
+    def _resumir_taxa(self, documento: Dict[str, Any]) -> Tuple[float, Any, Any]:
+        """
+        Extrai (valor percentual, _id, version) do documento de taxa
+        """
+        return (
+            self._converter_decimal128_para_float(documento.get('valor')),
+            documento.get('_id'),
+            documento.get('version'),
+        )
+    
+    def _buscar_taxa(self, ano: int, mes: int, tipo: str) -> Optional[Tuple[float, Any, Any]]:
+        """
+        Retorna (valor percentual, _id, version) da taxa do período (cache em memória; consulta o banco se ausente)
+        
+        Taxas ausentes no cache são procuradas novamente no banco (podem ter sido publicadas
+        depois da carga) e, se encontradas, passam a fazer parte do cache.
+        """
+        taxas = self._carregar_taxas(tipo)
+        taxa = taxas.get((ano, mes))
+        if taxa is None:
+            colecao = self.db.igpm_entity if tipo == 'IGPM' else self.db.ipca_entity
+            documento = colecao.find_one({
+                'anoReferencia': ano,
+                'mesReferencia': mes
+            }, PROJECAO_TAXA)
+            if documento:
+                taxa = self._resumir_taxa(documento)
+                taxas[(ano, mes)] = taxa
+        return taxa
+    
     def _obter_taxa_historica(self, ano: int, mes: int, tipo: str) -> float:
         """
         Obtém taxa histórica das coleções ipca_entity ou igpm_entity
         """
         try:
-            if tipo == 'IPCA':
-                colecao = self.db.ipca_entity
-            elif tipo == 'IGPM':
-                colecao = self.db.igpm_entity
-            else:
+            if tipo not in ('IPCA', 'IGPM'):
                 logger.warning(f"Tipo de índice não reconhecido: {tipo}. Usando IPCA.")
-                colecao = self.db.ipca_entity
             
-            # Buscar taxa na coleção
-            documento = colecao.find_one({
-                'anoReferencia': ano,
-                'mesReferencia': mes
-            })
+            # Buscar taxa (cache em memória das coleções de índices)
+            taxa = self._buscar_taxa(ano, mes, 'IGPM' if tipo == 'IGPM' else 'IPCA')
             
-            if documento:
-                valor_percentual = self._converter_decimal128_para_float(documento['valor'])
+            if taxa:
+                valor_percentual = taxa[0]
                 # Converter de percentual para fator (ex: 4.47% -> 1.0447)
                 taxa_fator = 1 + (valor_percentual / 100)
                 
@@ -292,20 +355,13 @@ class IPCAIGPMRecalculoService:
         Consulta taxa disponível na base de dados com informações detalhadas
         """
         try:
-            if tipo == 'IPCA':
-                colecao = self.db.ipca_entity
-            elif tipo == 'IGPM':
-                colecao = self.db.igpm_entity
-            else:
+            if tipo not in ('IPCA', 'IGPM'):
                 return {'success': False, 'error': f'Tipo de índice não reconhecido: {tipo}'}
             
-            documento = colecao.find_one({
-                'anoReferencia': ano,
-                'mesReferencia': mes
-            })
+            taxa = self._buscar_taxa(ano, mes, tipo)
             
-            if documento:
-                valor_percentual = self._converter_decimal128_para_float(documento['valor'])
+            if taxa:
+                valor_percentual, documento_id, versao = taxa
                 taxa_fator = 1 + (valor_percentual / 100)
                 
                 return {
@@ -316,8 +372,8 @@ class IPCAIGPMRecalculoService:
                     'mes': mes,
                     'valor_percentual': valor_percentual,
                     'taxa_fator': taxa_fator,
-                    'documento_id': str(documento['_id']),
-                    'version': documento.get('version'),
+                    'documento_id': str(documento_id),
+                    'version': versao,
                     'formatado': f"{valor_percentual:.4f}%"
                 }
             else:
@@ -348,8 +404,8 @@ class IPCAIGPMRecalculoService:
             elif ano_fim:
                 filtro['anoReferencia'] = {'$lte': ano_fim}
             
-            # Buscar documentos ordenados
-            cursor = colecao.find(filtro).sort([('anoReferencia', 1), ('mesReferencia', 1)])
+            # Buscar documentos ordenados (apenas os campos usados)
+            cursor = colecao.find(filtro, {'anoReferencia': 1, 'mesReferencia': 1, 'valor': 1}).sort([('anoReferencia', 1), ('mesReferencia', 1)])
             
             taxas = []
             for doc in cursor:
@@ -379,9 +435,12 @@ class IPCAIGPMRecalculoService:
             logger.error(f"Erro ao listar taxas {tipo}: {e}")
             return {'success': False, 'error': str(e)}
     
-    def _obter_valor_base_correcao(self, cco: Dict[str, Any], ano_correcao: int, mes_correcao: int) -> float:
+    def _obter_valor_base_correcao(self, cco: Dict[str, Any], ano_correcao: int, mes_correcao: int,
+                                   datas_correcoes: Optional[List[datetime]] = None) -> float:
         """
         Obtém o valor base para aplicação da correção IPCA/IGPM
+        
+        datas_correcoes: resultado de _datas_correcoes_ordenadas (calculado se não informado)
         """
         data_correcao = datetime(ano_correcao, mes_correcao, 1, tzinfo=timezone.utc)
         
@@ -390,6 +449,15 @@ class IPCAIGPMRecalculoService:
         if not correcoes:
             return self._converter_decimal128_para_float(cco.get('valorReconhecidoComOH', 0))
         
+        if datas_correcoes is None:
+            datas_correcoes = self._datas_correcoes_ordenadas(correcoes)
+        if datas_correcoes is not None:
+            # Timeline ordenada: a última correção anterior à data por busca binária
+            posicao = bisect_left(datas_correcoes, data_correcao) - 1
+            if posicao >= 0:
+                return self._converter_decimal128_para_float(correcoes[posicao].get('valorReconhecidoComOH', 0))
+            return self._converter_decimal128_para_float(cco.get('valorReconhecidoComOH', 0))
+        
         # Encontrar a correção imediatamente anterior à data de correção
         valor_base = self._converter_decimal128_para_float(cco.get('valorReconhecidoComOH', 0))
         
@@ -497,11 +565,36 @@ class IPCAIGPMRecalculoService:
     
     
     
+    def _datas_correcoes_ordenadas(self, correcoes: List[Dict[str, Any]]) -> Optional[List[datetime]]:
+        """
+        Retorna as datas das correções se todas existirem (com timezone) em ordem cronológica
+        
+        Caso contrário retorna None e as buscas usam a varredura linear original.
+        """
+        datas = []
+        anterior = None
+        for correcao in correcoes:
+            data = self._extrair_data_correcao(correcao)
+            if data is None or data.tzinfo is None or (anterior is not None and data < anterior):
+                return None
+            datas.append(data)
+            anterior = data
+        return datas
+    
     def _encontrar_posicao_insercao(self, correcoes: List[Dict[str, Any]], 
-                                   data_nova_correcao: datetime) -> int:
+                                   data_nova_correcao: datetime,
+                                   datas_correcoes: Optional[List[datetime]] = None) -> int:
         """
         Encontra a posição correta para inserir a nova correção na timeline
+        
+        datas_correcoes: resultado de _datas_correcoes_ordenadas (calculado se não informado)
         """
+        if datas_correcoes is None:
+            datas_correcoes = self._datas_correcoes_ordenadas(correcoes)
+        if datas_correcoes is not None:
+            # Primeira correção posterior à nova (mesma posição da varredura linear)
+            return bisect_right(datas_correcoes, data_nova_correcao)
+        
         for i, correcao in enumerate(correcoes):
             data_corr = self._extrair_data_correcao(correcao)
             if data_corr and data_corr > data_nova_correcao:
@@ -518,11 +611,14 @@ class IPCAIGPMRecalculoService:
         if not data_correcao:
             return None
         
+        # Caminho rápido: datas já decodificadas pelo BSON como datetime
+        if data_correcao.__class__ is datetime:
+            return data_correcao if data_correcao.tzinfo is not None else data_correcao.replace(tzinfo=timezone.utc)
+        
         try:
             if isinstance(data_correcao, str):
                 # Remover 'Z' e adicionar timezone UTC
-                data_str = data_correcao.replace('Z', '+00:00')
-                return datetime.fromisoformat(data_str)
+                return _converter_data_iso(data_correcao)
             elif hasattr(data_correcao, 'replace'):
                 # Já é datetime, garantir timezone
                 if data_correcao.tzinfo is None:
@@ -12,6 +12,7 @@ from typing import Any, Dict, List, Optional
 from pymongo import MongoClient
 
 from app.config import PESQUISA_AMBINTE_PRODUCAO
+from app.utils.mongo_utils import obter_cliente_mongo
 from app.utils.converters import (
     validar_e_converter_valor_monetario,
     converter_decimal128_para_float,
@@ -39,13 +40,13 @@ class PortalService:
             return self._get_db_prd()
         
         if self._db is None:
-            self._client = MongoClient(self.mongo_uri)
+            self._client = obter_cliente_mongo(self.mongo_uri)
             self._db = self._client.sgppServices
         return self._db
     
     def _get_db_prd(self):
         if self._db_prd is None:
-            self._client_prd = MongoClient(self.mongo_uri_prd)
+            self._client_prd = obter_cliente_mongo(self.mongo_uri_prd)
             self._db_prd = self._client_prd.sgppServices
         return self._db_prd
     
@@ -69,7 +69,8 @@ class IPCARecalculoManager:
         """
         print("\n=== IDENTIFICANDO GAPS IPCA/IGPM ===")
         
-        resultado = self.gap_analyzer.analisar_gaps_sistema(filtros)
+        # Análise pelo gerador de relatórios: reaproveitada no relatório executivo abaixo
+        resultado = self.report_generator.analisar(filtros)
         
         if 'error' in resultado:
             print(f"❌ Erro na análise: {resultado['error']}")
@@ -7,6 +7,11 @@ from bson.decimal128 import Decimal128
 
 logger = logging.getLogger(__name__)
 
+# Padrões usados a cada valor/data convertido, compilados uma vez
+_VALOR_ENTRE_ASPAS_RE = re.compile(r'"([^"]+)"')
+_DATA_BRASILEIRA_RE = re.compile(r'\d{2}/\d{2}/\d{4}')
+_TZ_SUFFIX_RE = re.compile(r'[+-]\d{4}$')
+
 def processar_json_mongodb(content):
     """
     Processa JSON que contém tipos BSON do MongoDB convertendo para tipos Python padrão
@@ -176,7 +181,7 @@ def validar_e_converter_valor_monetario(valor_str):
         # Remover qualquer wrapper NumberDecimal se ainda existir
         if 'NumberDecimal' in valor_str:
             # Extrair valor entre aspas
-            match = re.search(r'"([^"]+)"', valor_str)
+            match = _VALOR_ENTRE_ASPAS_RE.search(valor_str)
             if match:
                 valor_str = match.group(1)
         
@@ -227,11 +232,11 @@ def formatar_data_brasileira(data):
         # Se é string, tratar diferentes formatos
         if isinstance(data, str):
             # Evitar recursão - se já está formatado, retornar
-            if re.match(r'\d{2}/\d{2}/\d{4}', data):
+            if _DATA_BRASILEIRA_RE.match(data):
                 return data
             
             # Remover timezone info se presente (-0300, +0000, etc)
-            data_limpa = re.sub(r'[+-]\d{4}$', '', data)
+            data_limpa = _TZ_SUFFIX_RE.sub('', data)
             
             # Formato: 2021-02-22T23:54:30-0300 -> 2021-02-22T23:54:30
             # Formato: 2023-01-05 12:56:56.786Z -> 2023-01-05 12:56:56.786
@@ -8,6 +8,11 @@ from decimal import Decimal
 from bson import ObjectId
 from bson.decimal128 import Decimal128
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class MongoJSONEncoder(json.JSONEncoder):
     """Encoder JSON customizado para tipos BSON do MongoDB"""
@@ -29,9 +34,28 @@ class MongoJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+_MONGO_ENCODER = MongoJSONEncoder()
+
+# Datas passam pelo mesmo default do encoder (isoformat), como no json da biblioteca padrão
+_ORJSON_OPCOES = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None else 0
+)
+
+
+def dumps_mongo(data) -> bytes:
+    """Serializa para JSON (UTF-8) tratando tipos BSON; usa orjson quando disponível"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=_MONGO_ENCODER.default, option=_ORJSON_OPCOES)
+        except orjson.JSONEncodeError:
+            # Casos não suportados pelo orjson (ex: inteiros acima de 64 bits) seguem pelo json
+            pass
+    return json.dumps(data, cls=MongoJSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
 def json_response(data, status_code=200):
     """Helper para retornar resposta JSON com encoder customizado"""
     from flask import Response
     
-    json_str = json.dumps(data, cls=MongoJSONEncoder, ensure_ascii=False)
-    return Response(json_str, mimetype='application/json', status=status_code)
\ No newline at end of file
+    return Response(dumps_mongo(data), mimetype='application/json', status=status_code)
\ No newline at end of file
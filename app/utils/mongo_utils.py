@@ -0,0 +1,41 @@
+"""
+Clientes MongoDB compartilhados pelo processo.
+
+O MongoClient mantém o próprio pool de conexões e é thread-safe: criar um cliente por
+requisição refaz handshake TCP/TLS/autenticação a cada chamada. As rotas e serviços
+devem obter o cliente por aqui e repassar o banco (db) aos serviços.
+"""
+
+from functools import lru_cache
+
+from pymongo import MongoClient
+
+# Dimensionamento do pool de conexões de cada cliente
+MONGO_MAX_POOL_SIZE = 50
+MONGO_MIN_POOL_SIZE = 5
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000
+
+# Índices consultados pela aplicação, criados fora das requisições por
+# app/services/criar_indices_mongodb.py (ver README)
+
+# Índice composto que atende à ordenação da análise de gaps (contrato, campo, data de reconhecimento)
+INDICE_CCO_ANALISE = [('contratoCpp', 1), ('campo', 1), ('dataReconhecimento', 1)]
+NOME_INDICE_CCO_ANALISE = 'cpp_campo_data'
+
+# Índice das coleções de taxas (ipca_entity/igpm_entity): inclui 'valor' para que as consultas
+# por período, que projetam apenas ano, mês e valor, sejam respondidas só pelo índice
+INDICE_TAXAS = [('anoReferencia', 1), ('mesReferencia', 1), ('valor', 1)]
+NOME_INDICE_TAXAS = 'ano_mes_valor'
+
+
+@lru_cache(maxsize=None)
+def obter_cliente_mongo(uri: str) -> MongoClient:
+    """
+    Retorna o MongoClient do processo para a URI (criado na primeira chamada)
+    """
+    return MongoClient(
+        uri,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    )